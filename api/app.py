@@ -1,8 +1,29 @@
+import atexit
+
 from api.app_setup import create_app
-from api.jobs import bg_scheduler
+from api.jobs import bg_scheduler, flush_token_usage
+from api.services import DataSourceDataService as _DataSourceDataService
+from api.settings import INGESTION_MODE
 
 app = create_app()
 bg_scheduler.start()
+# Writes the token usage that has not been flushed yet on a clean shutdown
+atexit.register(flush_token_usage)
+
+if INGESTION_MODE == 'write_behind':
+    # Started by the process that serves requests, so CLI commands and the
+    # parent process of the reloader do not replay the WAL of the server
+    @app.before_first_request
+    def start_ingestion_buffer():
+        try:
+            _DataSourceDataService.start_ingestion_buffer(
+                _DataSourceDataService)
+        except RuntimeError as err:
+            # Queued readings are refused until the buffer has been started
+            app.logger.error(f'Unable to start the ingestion buffer: {err}')
+
+    atexit.register(_DataSourceDataService.stop_ingestion_buffer,
+                    _DataSourceDataService)
 
 if __name__ == "__main__":
     app.run()
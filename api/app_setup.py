@@ -2,16 +2,19 @@ from datetime import timedelta
 from http import HTTPStatus
 
 from authlib.flask.client import OAuth
-from flask import Flask, render_template, g
+from flask import Flask, render_template, g, request
 from flask_jwt_extended import JWTManager
 
 from api.dashboard.dash_overview import add_dash as dash_overview
 from api.dashboard.dash_forecast import add_dash as dash_forecast
 from api.dashboard.dash_routes import blueprint as dash_blueprint
+from api.helpers import JSONEncoder
 from api.models import initialize_database
 from api.routes import blueprint_api as api_v1
 from api.routes import blueprint_index as index
-from api.settings import (FLASK_APP_NAME, FLASK_PERMANENT_SESSION_LIFETIME,
+from api.settings import (COMPRESSION_BROTLI_QUALITY, COMPRESSION_ENABLED,
+                          COMPRESSION_GZIP_LEVEL, COMPRESSION_MIN_SIZE,
+                          FLASK_APP_NAME, FLASK_PERMANENT_SESSION_LIFETIME,
                           FLASK_SECRET_KEY, GET_PATH, GITHUB_CLIENT_ID,
                           GITHUB_CLIENT_SECRET, GOOGLE_CLIENT_ID,
                           GOOGLE_CLIENT_SECRET, JWT_ACCESS_TOKEN_EXPIRES,
@@ -26,6 +29,7 @@ def register_config(app: Flask):
     for location in JWT_TOKEN_LOCATION:
         jwt_locations.append(location)
 
+    app.json_encoder = JSONEncoder
     app.config['RESTPLUS_VALIDATE'] = True
     app.config['SECRET_KEY'] = FLASK_SECRET_KEY
     app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(
@@ -78,19 +82,116 @@ def register_blueprints(app: Flask):
 
 
 def register_request_handlers(app: Flask):
-    from api.models import database
-    # request handler to open the database connection
+    from api.models import close_replicas, database, set_read_your_writes
+    # request handler to borrow a connection from the connection pool
     @app.before_request
     def before_request():
         g.db = database
-        g.db.connect()
+        g.db.connect(reuse_if_open=True)
+        # Clients that need to read data they have just written can skip the
+        # read replicas
+        read_your_writes = request.headers.get('X-Read-Your-Writes', '')
+        set_read_your_writes(read_your_writes.lower() in ('1', 'true'))
+
+    # request handler to return the connection to the connection pool, also
+    # runs when the request raised an exception
+    @app.teardown_request
+    def teardown_request(exception):
+        if not database.is_closed():
+            database.close()
+        close_replicas()
+        set_read_your_writes(False)
 
-    # request handler to close the database connection
+    return app
+
+
+def register_response_compression(app: Flask):
+    from api.dashboard.dash_forecast.occupancy_forecast import \
+        url_base as dash_forecast_url_base
+    from api.dashboard.dash_overview.occupancy_overview import \
+        url_base as dash_overview_url_base
+    from api.helpers import compress_response
+    compressed_paths = (api_v1.url_prefix + '/', dash_overview_url_base,
+                        dash_forecast_url_base)
+
+    # request handler that compresses the API and dashboard responses
     @app.after_request
     def after_request(response):
-        g.db = database
-        g.db.close()
-        return response
+        if not request.path.startswith(compressed_paths):
+            return response
+        return compress_response(response,
+                                 request.accept_encodings,
+                                 min_size=COMPRESSION_MIN_SIZE,
+                                 gzip_level=COMPRESSION_GZIP_LEVEL,
+                                 brotli_quality=COMPRESSION_BROTLI_QUALITY)
+
+    return app
+
+
+def register_commands(app: Flask):
+    import click
+
+    @app.cli.command('rebuild-rollups')
+    @click.option('--data-source-id', type=int, default=None,
+                  help='Only rebuild the rollups of this data source')
+    @click.option('--start-date', default=None,
+                  help='First day to rebuild in YYYY-mm-dd format')
+    @click.option('--end-date', default=None,
+                  help='Last day to rebuild in YYYY-mm-dd format')
+    def rebuild_rollups(data_source_id, start_date, end_date):
+        """Rebuilds the hourly and daily rollups from the stored readings"""
+        from api.models import database
+        from api.services import DataSourceDataRollupService as _Service
+        try:
+            with database.connection_context():
+                result = _Service.rebuild_rollups(_Service, data_source_id,
+                                                  start_date, end_date)
+        except ValueError as err:
+            raise click.ClickException(str(err.args[-1]))
+        for table_name, number_of_rows in result.items():
+            click.echo(f'Rebuilt {number_of_rows} rows of {table_name}')
+
+    @app.cli.command('backfill-weather')
+    def backfill_weather():
+        """Extracts the typed columns of previously stored weather data"""
+        from api.models import database
+        from api.services import WeatherService as _WeatherService
+        with database.connection_context():
+            updated = _WeatherService.backfill_weather_columns(
+                _WeatherService)
+        click.echo(f'Updated {updated} weather rows')
+
+    @app.cli.command('archive-data')
+    @click.option('--older-than-days', type=int, default=None,
+                  help='Number of days to keep in the database, defaults to '
+                  'ARCHIVE_AFTER_DAYS')
+    def archive_data(older_than_days):
+        """Moves old data source data and weather rows to Parquet files"""
+        from api.models import database
+        from api.services import ArchiveService as _ArchiveService
+        from api.settings import ARCHIVE_AFTER_DAYS
+        if older_than_days is None:
+            older_than_days = ARCHIVE_AFTER_DAYS
+        with database.connection_context():
+            result = _ArchiveService.archive_old_data(_ArchiveService,
+                                                      older_than_days)
+        for table_name, table_result in result.items():
+            click.echo(f'Archived {table_result["rows"]} rows of {table_name} '
+                       f'to {table_result["files"]} files')
+
+    @app.cli.command('partition-tables')
+    def partition_tables():
+        """Converts the time series tables to monthly partitions"""
+        from api.models import database
+        from api.models.partition import PARTITIONED_TABLES, partition_table
+        from api.settings import PARTITION_MONTHS_AHEAD
+        with database.connection_context():
+            for table_name in PARTITIONED_TABLES:
+                if partition_table(database, table_name,
+                                   PARTITION_MONTHS_AHEAD):
+                    click.echo(f'Partitioned {table_name}')
+                else:
+                    click.echo(f'{table_name} is already partitioned')
 
     return app
 
@@ -104,6 +205,9 @@ def create_app():
     app = register_extensions(app)
     app = register_errorpages(app)
     app = register_request_handlers(app)
+    if COMPRESSION_ENABLED:
+        app = register_response_compression(app)
+    app = register_commands(app)
     # Initializes the routes
     app = register_blueprints(app)
     # Initializes the dash graphs
@@ -49,24 +49,21 @@ def _retrieve_forecast_data():
 
 
 def _retrieve_current_clients(data_source_id: int = 2):
-    from api.models import DataSourceData
+    from api.services import \
+        DataSourceDataRollupService as _DataSourceDataRollupService
     start_week, end_week = _get_start_and_end_of_week()
     start_week = start_week.strftime('%Y-%m-%d')
     end_week = end_week.strftime('%Y-%m-%d')
-    data_source_data_df = DataFrame(
-        list(DataSourceData.select().where(
-            DataSourceData.data_source_id == data_source_id,
-            DataSourceData.created_date >= start_week,
-            DataSourceData.created_date <= end_week).dicts()))
-    if not data_source_data_df.empty:
-        data_source_data_df['created_date'] = data_source_data_df[
-            'created_date'].map(lambda x: x.replace(second=0))
-        # substract the number of always connected clients
-        data_source_data_df['no_of_clients'] = data_source_data_df[
-            'no_of_clients'] - 8
-        data_source_data_df.loc[
-            data_source_data_df['no_of_clients'] < 0, 'no_of_clients'] = 0
-    return data_source_data_df
+    # The average number of clients per hour, without the always connected
+    # clients, is read from the hourly rollups like the forecast is trained
+    return DataFrame(
+        _DataSourceDataRollupService.get_hourly_data_from_data_source(
+            _DataSourceDataRollupService,
+            data_source_id,
+            start_week,
+            end_week,
+            occasional_clients=True),
+        columns=['id', 'data_source', 'no_of_clients', 'created_date'])
 
 
 day_of_week_names = [
@@ -130,8 +127,9 @@ layout = html.Div([
 
 
 def add_dash(server):
+    # Responses are compressed by the compression request handler of the app
     dash_app = Dash(__name__, server=server, url_base_pathname=url_base,
-                    assets_folder=GET_PATH() + '/static')
+                    assets_folder=GET_PATH() + '/static', compress=False)
     apply_layout(dash_app, layout)
 
     @dash_app.callback(Output('occupancy-forecast', 'figure'), [
@@ -10,6 +10,7 @@ from pandas import DataFrame, read_pickle
 from api.dashboard.dash_function import apply_layout
 from api.helpers.check_token_type_decorator import jwt_required_extended
 from api.helpers.data_frame_helper import cached_dataframe_outdated
+from api.models import use_replica
 from api.settings import GET_PATH
 
 url_base = '/dash/app1/'
@@ -77,33 +78,41 @@ temperature_label_dict = {
 }
 
 
+@use_replica
 def _retrieve_data(data_source_id: int = 2):
-    from api.models import DataSourceData, Weather, Forecast
-    from playhouse.shortcuts import model_to_dict
-
-    from api.helpers.data_frame_helper import (flatten_json_data_in_column,
-                                               filter_column_json_data)
+    from api.models import Weather, Forecast
+    from api.services import ArchiveService as _ArchiveService
+    from api.services import \
+        DataSourceDataRollupService as _DataSourceDataRollupService
 
+    # The average number of clients per hour is read from the hourly
+    # rollups, which are kept when the readings are archived
     data_source_data_df = DataFrame(
-        list(DataSourceData.select().where(
-            DataSourceData.data_source_id == data_source_id).dicts()))
-    # floors the seconds to 0, move it to the server function so that the user can
-    # interact with it.
-    data_source_data_df['created_date'] = data_source_data_df['created_date'].map(
-        lambda x: x.replace(second=0))
-    hourly_weather_query = Weather.select().where(
-        Weather.weather_forecast_type == Forecast.HOURLY)
-    hourly_filter = "{dt: dt,  weather: {main: weather[0].main,"\
-        "description: weather[0].description}, main: main, wind: wind"\
-        ", rain: rain, clouds: clouds}"
-    hourly_weather_array = []
-    for weather in hourly_weather_query:
-        hourly_weather_array.append(model_to_dict(weather, recurse=False))
-
-    hourly_weater_df = DataFrame(hourly_weather_array)
-    hourly_weater_df = filter_column_json_data(hourly_weater_df, 'data',
-                                               hourly_filter)
-    hourly_weater_df = flatten_json_data_in_column(hourly_weater_df, 'data')
+        _DataSourceDataRollupService.get_hourly_data_from_data_source(
+            _DataSourceDataRollupService, data_source_id, None, None),
+        columns=['id', 'data_source', 'no_of_clients', 'created_date'])
+    # The typed weather columns are named after the flattened JSON paths the
+    # graph uses
+    hourly_weater_df = _ArchiveService.get_data_frame(
+        _ArchiveService, Weather,
+        filters={'weather_forecast_type': Forecast.HOURLY},
+        columns=['measured_date', 'temp', 'temp_min', 'temp_max', 'humidity',
+                 'pressure', 'wind_speed', 'clouds', 'rain_1h', 'rain_3h',
+                 'weather_main', 'weather_description'])
+    hourly_weater_df = hourly_weater_df.rename(columns={
+        'measured_date': 'data_dt',
+        'temp': 'data_main.temp',
+        'temp_min': 'data_main.temp_min',
+        'temp_max': 'data_main.temp_max',
+        'humidity': 'data_main.humidity',
+        'pressure': 'data_main.pressure',
+        'wind_speed': 'data_wind.speed',
+        'clouds': 'data_clouds.all',
+        'rain_1h': 'data_rain.1h',
+        'rain_3h': 'data_rain.3h',
+        'weather_main': 'data_weather.main',
+        'weather_description': 'data_weather.description'
+    })
     return {
         "data_source_data_df": data_source_data_df,
         "hourly_weather_data_df": hourly_weater_df
@@ -112,8 +121,9 @@ def _retrieve_data(data_source_id: int = 2):
 # flake8: noqa: C901
 
 def add_dash(server):
+    # Responses are compressed by the compression request handler of the app
     dash_app = Dash(__name__, server=server, url_base_pathname=url_base,
-                    assets_folder=GET_PATH() + '/static')
+                    assets_folder=GET_PATH() + '/static', compress=False)
     apply_layout(dash_app, layout)
 
     @dash_app.callback(Output('occupancy-graph', 'figure'), [
@@ -201,8 +211,8 @@ def add_dash(server):
         figure.add_trace(
             go.Bar(x=data_source_data_df['created_date'],
                    y=data_source_data_df['no_of_clients'],
-                   name='Number of clients',
-                   hovertemplate='<b>Connected clients</b>: %{y}' +
+                   name='Average number of clients per hour',
+                   hovertemplate='<b>Connected clients</b>: %{y:.1f}' +
                    '<br>date: %{x} </br>',
                    marker=go.bar.Marker(
                        color='rgb(63, 81, 181)'
@@ -14,7 +14,14 @@ class CreateDataSourceDto:
 
 
 class CreateDataSourceDataDto:
+    __slots__ = ('no_of_clients', 'created_date', 'idempotency_key')
+
     no_of_clients: int
+    created_date: str
+    idempotency_key: str
 
-    def __init__(self, no_of_clients):
+    def __init__(self, no_of_clients, created_date=None,
+                 idempotency_key=None):
         self.no_of_clients = no_of_clients
+        self.created_date = created_date
+        self.idempotency_key = idempotency_key
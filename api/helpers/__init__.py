@@ -1,11 +1,24 @@
 # from .flask_jwt_responses import custom_expired_token_loader, custom_unauthorized_loader
-from .check_token_type_decorator import check_for, jwt_required_extended
+from .binary_payload import (BINARY_READING_MIMETYPE, BINARY_READING_STRUCT,
+                             pack_binary_readings, unpack_binary_readings)
+from .cache import RecentKeySet, TimedLRUCache
+from .compression import compress_response
+from .conditional_request import conditional_get
+from .check_token_type_decorator import (AuthContext, check_for,
+                                         get_auth_context,
+                                         get_current_identity,
+                                         jwt_required_extended)
+from .ingestion_buffer import IngestionBuffer
+from .json_provider import JSONEncoder, dumps, jsonify
 from .json_to_object_decorator import convert_input_to_tuple
+from .pagination import (apply_cursor, apply_keyset, decode_cursor,
+                         encode_cursor)
 from .response_helper import (ErrorObject, SuccessObject,
                               add_extra_info_to_dict, remove_items_from_dict)
 from .serializer import (date_time_serializer, filter_items_from_list,
-                         json_to_object, to_rfc3339_datetime, to_utc_datetime)
-from .validators import (validate_dateformat, validate_string_bool,
-                         validate_string_int)
+                         json_to_object, to_columns, to_epoch,
+                         to_rfc3339_datetime, to_utc_datetime)
+from .validators import (validate_dateformat, validate_datetimeformat,
+                         validate_string_bool, validate_string_int)
 
 # from .flask_jwt_responses import *
@@ -0,0 +1,57 @@
+import struct
+from datetime import datetime
+from http import HTTPStatus
+
+from api.dto import CreateDataSourceDataDto
+
+BINARY_READING_MIMETYPE = 'application/octet-stream'
+# A reading is packed as a big endian unsigned 32 bit integer containing the
+# time of measurement in seconds since the epoch (UTC, 0 means the time of
+# arrival), followed by an unsigned 16 bit integer containing the number of
+# clients. A payload consists of one or more consecutive readings.
+BINARY_READING_STRUCT = struct.Struct('!IH')
+
+
+def unpack_binary_readings(payload: bytes):
+    """Decodes a binary payload into data transfer objects
+
+    Arguments:
+        payload {bytes} -- one or more packed readings
+
+    Raises:
+        ValueError: Payload is empty or its size is not a multiple of the
+        size of a reading
+
+    Returns:
+        list -- list of CreateDataSourceDataDto
+    """
+    if not payload or len(payload) % BINARY_READING_STRUCT.size != 0:
+        raise ValueError(
+            HTTPStatus.BAD_REQUEST,
+            f'Payload must contain one or more readings of '
+            f'{BINARY_READING_STRUCT.size} bytes')
+
+    readings = []
+    for timestamp, no_of_clients in BINARY_READING_STRUCT.iter_unpack(
+            payload):
+        created_date = None
+        if timestamp:
+            created_date = datetime.utcfromtimestamp(timestamp).strftime(
+                '%Y-%m-%d %H:%M:%S')
+        readings.append(CreateDataSourceDataDto(no_of_clients, created_date))
+    return readings
+
+
+def pack_binary_readings(readings: list):
+    """Encodes readings into a binary payload, used by clients and tests
+
+    Arguments:
+        readings {list} -- tuples of the timestamp in seconds since the epoch
+        and the number of clients
+
+    Returns:
+        bytes -- packed readings
+    """
+    return b''.join(
+        BINARY_READING_STRUCT.pack(timestamp, no_of_clients)
+        for timestamp, no_of_clients in readings)
@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from hashlib import blake2b
+
+_MISSING = object()
+
+
+class TimedLRUCache:
+    """A thread safe least recently used cache. Entries are evicted when the
+    cache exceeds max_size and, if a ttl is given, expire ttl seconds after
+    they have been set.
+    """
+    def __init__(self, max_size: int = 1024, ttl: float = None):
+        """Initializes the cache
+
+        Keyword Arguments:
+            max_size {int} -- maximum number of entries (default: {1024})
+            ttl {float} -- number of seconds an entry stays valid, entries
+            never expire if ttl is None (default: {None})
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Retrieves an entry from the cache
+
+        Arguments:
+            key -- key of the entry
+
+        Keyword Arguments:
+            default -- value to return if the key is not cached or has expired
+            (default: {None})
+        """
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Adds or replaces an entry in the cache
+
+        Arguments:
+            key -- key of the entry
+            value -- value of the entry
+        """
+        expires_at = None
+        if self.ttl is not None:
+            expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        """Removes an entry from the cache"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Removes all the entries from the cache"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RecentKeySet:
+    """A thread safe bounded set that remembers the most recently added keys.
+    Keys are stored as 64 bit hashes to keep the memory footprint small, the
+    oldest key is forgotten once the set exceeds max_size.
+    """
+    def __init__(self, max_size: int = 100000):
+        """Initializes the set
+
+        Keyword Arguments:
+            max_size {int} -- maximum number of keys to remember
+            (default: {100000})
+        """
+        self.max_size = max_size
+        self._hashes = set()
+        self._order = deque()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _hash(key: str):
+        return int.from_bytes(
+            blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big')
+
+    def add(self, key: str):
+        """Adds a key to the set
+
+        Arguments:
+            key {str} -- key to remember
+        """
+        key_hash = RecentKeySet._hash(key)
+        with self._lock:
+            if key_hash in self._hashes:
+                return
+            self._hashes.add(key_hash)
+            self._order.append(key_hash)
+            while len(self._order) > self.max_size:
+                self._hashes.discard(self._order.popleft())
+
+    def __contains__(self, key: str):
+        return RecentKeySet._hash(key) in self._hashes
+
+    def __len__(self):
+        return len(self._hashes)
@@ -1,15 +1,72 @@
 from functools import wraps
 from http import HTTPStatus
 
+from flask import g
 from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
 
 from .response_helper import ErrorObject
 
 
+class AuthContext:
+    """The result of the authentication of the current request.
+
+    Attributes:
+        identity {dict} -- identity stored in the JWT
+        is_user_token {bool} -- True if the JWT belongs to an user
+        data_source_token_id {int} -- Id of the data source token, None for
+        user tokens
+        is_active {bool} -- False if the data source token has been revoked
+    """
+    __slots__ = ('identity', 'is_user_token', 'data_source_token_id',
+                 'is_active')
+
+    def __init__(self, identity: dict, is_active: bool = True):
+        self.identity = identity
+        self.is_user_token = identity['is_user_token'] is not False
+        self.data_source_token_id = None
+        if not self.is_user_token:
+            self.data_source_token_id = identity['data_source_token']['id']
+        self.is_active = is_active
+
+
 def _token_usage_counter_add(token_id: int):
     from api.services.data_source_token import DataSourceTokenService
-    DataSourceTokenService.update_hit_count_and_date(DataSourceTokenService,
-                                                     token_id)
+    DataSourceTokenService.record_token_usage(DataSourceTokenService,
+                                              token_id)
+
+
+def get_auth_context():
+    """Authenticates the current request. The JWT is verified, the token
+    usage is counted and the state of a data source token is checked once
+    per request, the result is stored on flask.g and reused by every
+    decorator and route of the request.
+
+    Returns:
+        AuthContext -- The authentication context of the current request
+    """
+    auth_context = g.get('auth_context')
+    if auth_context is None:
+        verify_jwt_in_request()
+        auth_context = AuthContext(get_jwt_identity())
+        if not auth_context.is_user_token:
+            from api.services.data_source_token import \
+                DataSourceTokenService
+            _token_usage_counter_add(auth_context.data_source_token_id)
+            auth_context.is_active = \
+                DataSourceTokenService.check_if_token_is_active(
+                    DataSourceTokenService,
+                    auth_context.data_source_token_id)
+        g.auth_context = auth_context
+    return auth_context
+
+
+def get_current_identity():
+    """Retrieves the identity of the JWT of the current request
+
+    Returns:
+        dict -- identity stored in the JWT
+    """
+    return get_auth_context().identity
 
 
 def jwt_required_extended(fn):
@@ -20,21 +77,15 @@ def jwt_required_extended(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
         try:
-            verify_jwt_in_request()
+            auth_context = get_auth_context()
         except IndexError:
             return ErrorObject.create_response(
                 ErrorObject, HTTPStatus.UNAUTHORIZED,
                 'No token provided in the format of "Bearer <JWT>"')
-        token = get_jwt_identity()
-        if token['is_user_token'] is False:
-            from api.services.data_source_token import \
-                DataSourceTokenService
-            _token_usage_counter_add(token['data_source_token']['id'])
-            if not DataSourceTokenService.check_if_token_is_active(
-                    DataSourceTokenService, token['data_source_token']['id']):
-                return ErrorObject.create_response(ErrorObject,
-                                                   HTTPStatus.FORBIDDEN,
-                                                   'Token has been revoked')
+        if not auth_context.is_active:
+            return ErrorObject.create_response(ErrorObject,
+                                               HTTPStatus.FORBIDDEN,
+                                               'Token has been revoked')
         return fn(*args, **kwargs)
 
     return wrapper
@@ -46,10 +97,7 @@ def is_user_check(fn):
     """
     @wraps(fn)
     def wrapper(*args, **kwargs):
-        verify_jwt_in_request()
-        token = get_jwt_identity()
-        if token['is_user_token'] is False:
-            _token_usage_counter_add(token['data_source_token']['id'])
+        if not get_auth_context().is_user_token:
             return ErrorObject.create_response(
                 ErrorObject, HTTPStatus.FORBIDDEN,
                 'Unable to access this resource with provided token')
@@ -79,16 +127,10 @@ def check_for(argument: str):
         """
         @wraps(fn)
         def wrapper(*args, **kwargs):
-            verify_jwt_in_request()
-            token = get_jwt_identity()
+            auth_context = get_auth_context()
             if argument.lower() == 'machine':
-                if token['is_user_token'] is False:
-                    from api.services.data_source_token import \
-                        DataSourceTokenService
-                    _token_usage_counter_add(token['data_source_token']['id'])
-                    if DataSourceTokenService.check_if_token_is_active(
-                            DataSourceTokenService,
-                            token['data_source_token']['id']) is False:
+                if not auth_context.is_user_token:
+                    if auth_context.is_active is False:
                         return ErrorObject.create_response(
                             ErrorObject, HTTPStatus.FORBIDDEN,
                             'Token has been revoked')
@@ -99,8 +141,7 @@ def check_for(argument: str):
                         ErrorObject, HTTPStatus.FORBIDDEN,
                         'Unable to access this resource with provided token')
             elif argument.lower() == 'user':
-                if token['is_user_token'] is False:
-                    _token_usage_counter_add(token['data_source_token']['id'])
+                if not auth_context.is_user_token:
                     return ErrorObject.create_response(
                         ErrorObject, HTTPStatus.FORBIDDEN,
                         'Unable to access this resource with provided token')
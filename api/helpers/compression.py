@@ -0,0 +1,127 @@
+import zlib
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is used without it
+    brotli = None
+
+_COMPRESSIBLE_MIMETYPES = ('application/json', 'application/javascript',
+                           'text/html', 'text/css', 'text/javascript',
+                           'text/plain')
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        # wbits 31 writes a gzip header and trailer
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+
+class _BrotliCompressor:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.finish()
+
+
+def _select_encoding(accept_encodings):
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def _is_compressible(response):
+    return (200 <= response.status_code < 300 and
+            response.status_code != 204 and
+            not response.direct_passthrough and
+            'Content-Encoding' not in response.headers and
+            response.mimetype in _COMPRESSIBLE_MIMETYPES and
+            'no-transform' not in response.headers.get('Cache-Control', ''))
+
+
+def _compress_chunks(compressor, chunks, iterable):
+    """Compresses the chunks of a streamed response as they are produced
+
+    Arguments:
+        compressor {object} -- gzip or brotli compressor
+        chunks {iterable} -- encoded chunks of the response
+        iterable {iterable} -- original iterable of the response
+
+    Yields:
+        bytes -- compressed chunks
+    """
+    try:
+        for chunk in chunks:
+            compressed_chunk = compressor.compress(chunk)
+            if compressed_chunk:
+                yield compressed_chunk
+        yield compressor.flush()
+    finally:
+        # Closes the original iterable, so a stream_with_context generator
+        # releases its request context
+        if hasattr(iterable, 'close'):
+            iterable.close()
+
+
+def compress_response(response,
+                      accept_encodings,
+                      min_size: int = 500,
+                      gzip_level: int = 6,
+                      brotli_quality: int = 4):
+    """Compresses a response with brotli or gzip, depending on the encodings
+    accepted by the client. Responses that are smaller than min_size are not
+    compressed, streamed responses are compressed chunk by chunk.
+
+    Arguments:
+        response {Response} -- response to compress
+        accept_encodings {Accept} -- parsed Accept-Encoding header of the
+        request
+
+    Keyword Arguments:
+        min_size {int} -- minimum number of bytes to compress (default: {500})
+        gzip_level {int} -- gzip compression level (default: {6})
+        brotli_quality {int} -- brotli compression quality (default: {4})
+
+    Returns:
+        Response -- the compressed response
+    """
+    if not _is_compressible(response):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = _select_encoding(accept_encodings)
+    if encoding is None:
+        return response
+    if not response.is_streamed and \
+            response.calculate_content_length() < min_size:
+        return response
+
+    if encoding == 'br':
+        compressor = _BrotliCompressor(brotli_quality)
+    else:
+        compressor = _GzipCompressor(gzip_level)
+    if response.is_streamed:
+        response.response = _compress_chunks(compressor,
+                                             response.iter_encoded(),
+                                             response.response)
+        response.headers.pop('Content-Length', None)
+    else:
+        response.set_data(
+            compressor.compress(response.get_data()) + compressor.flush())
+    response.headers['Content-Encoding'] = encoding
+
+    # The compressed body differs from the uncompressed body
+    etag, is_weak = response.get_etag()
+    if etag and not is_weak:
+        response.set_etag(etag, weak=True)
+    return response
@@ -0,0 +1,88 @@
+import hashlib
+from functools import wraps
+from http import HTTPStatus
+
+from flask import current_app, g, make_response, request
+
+
+def _create_etag(versions: list):
+    """Creates an entity tag from the versions of the data sets and the
+    path and query parameters of the current request
+
+    Arguments:
+        versions {list} -- tuples of data set name and version
+
+    Returns:
+        str -- entity tag
+    """
+    validator = hashlib.sha1()
+    for name, version in versions:
+        validator.update(f'{name}={version};'.encode('utf-8'))
+    validator.update(request.path.encode('utf-8'))
+    for key, value in sorted(request.args.items(multi=True)):
+        validator.update(f';{key}={value}'.encode('utf-8'))
+    return validator.hexdigest()
+
+
+def _is_not_modified(etag: str, last_modified):
+    # If-None-Match takes precedence over If-Modified-Since (RFC 7232)
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified:
+        return last_modified.replace(
+            microsecond=0) <= request.if_modified_since
+    return False
+
+
+def conditional_get(*data_set_names: str):
+    """A decorator that answers conditional GET requests. The validators are
+    derived from the versions of the given data sets, so a request whose
+    If-None-Match or If-Modified-Since header is still valid is answered with
+    304 Not Modified without calling the decorated function. Successful
+    responses get a weak ETag and a Last-Modified header. The versions are
+    available to the decorated function as g.data_versions, a dictionary of
+    data set name and version.
+
+    Arguments:
+        data_set_names {str} -- names of the data sets the response is
+        derived from
+    """
+    def conditional(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            from api.models import replica_reads
+            from api.services.data_version import DataVersionService
+            versions, last_modified = [], None
+            # The versions are read before the response and from the replica
+            # the response is read from. A version is bumped after its data
+            # has been written, so the response is never older than the
+            # validators.
+            with replica_reads():
+                for name in data_set_names:
+                    version, updated_date = \
+                        DataVersionService.get_version_info(
+                            DataVersionService, name)
+                    versions.append((name, version))
+                    if updated_date and (last_modified is None or
+                                         updated_date > last_modified):
+                        last_modified = updated_date
+            g.data_versions = dict(versions)
+            etag = _create_etag(versions)
+
+            if _is_not_modified(etag, last_modified):
+                response = current_app.response_class(
+                    status=HTTPStatus.NOT_MODIFIED)
+            else:
+                response = make_response(fn(*args, **kwargs))
+                if response.status_code != HTTPStatus.OK:
+                    return response
+            response.set_etag(etag, weak=True)
+            if last_modified:
+                response.last_modified = last_modified
+            # Clients have to revalidate the response before reusing it
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+
+        return wrapper
+
+    return conditional
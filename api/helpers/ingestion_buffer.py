@@ -0,0 +1,226 @@
+import fcntl
+import glob
+import json
+import logging
+import os
+import threading
+import time
+
+_ACTIVE_WAL_NAME = 'ingestion.wal'
+_SEGMENT_PATTERN = 'ingestion.*.segment'
+_LOCK_NAME = 'ingestion.lock'
+_FAILED_SEGMENT_SUFFIX = '.failed'
+
+_logger = logging.getLogger(__name__)
+
+
+class IngestionBuffer:
+    """An in-process write-behind buffer backed by an append-only write-ahead
+    log (WAL).
+
+    Every appended row is written to the active WAL file before it is queued,
+    so rows that have been accepted survive a crash. A background thread
+    drains the queue whenever the number of queued rows reaches flush_size or
+    when flush_interval seconds have passed. On a flush the active WAL file is
+    rotated into a segment, the queued rows are handed to the writer and the
+    segment is removed once the writer succeeds. Segments that could not be
+    written are retried on the next flush and on startup, unless the writer
+    raised one of the unwritable errors. Such a segment is renamed to
+    <segment>.failed, so it does not block the segments after it.
+
+    The WAL directory is locked while the buffer is running, a second process
+    cannot start a buffer on the same directory.
+    """
+    def __init__(self,
+                 writer,
+                 wal_directory: str,
+                 flush_size: int = 500,
+                 flush_interval: float = 5.0,
+                 fsync: bool = False,
+                 unwritable_errors: tuple = ()):
+        """Initializes the ingestion buffer
+
+        Arguments:
+            writer {callable} -- function that persists a list of rows
+            wal_directory {str} -- directory to store the WAL files in
+
+        Keyword Arguments:
+            flush_size {int} -- number of queued rows that triggers a flush
+            (default: {500})
+            flush_interval {float} -- maximum number of seconds between
+            flushes (default: {5.0})
+            fsync {bool} -- fsync the WAL after every append (default: {False})
+            unwritable_errors {tuple} -- exception types of the writer that
+            indicate that the rows of a segment can never be written
+            (default: {()})
+        """
+        self.writer = writer
+        self.wal_directory = wal_directory
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.unwritable_errors = unwritable_errors
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_requested = threading.Event()
+        self._stopped = threading.Event()
+        self._pending = []
+        self._wal_file = None
+        self._lock_file = None
+        self._thread = None
+        self._segment_counter = 0
+
+    @property
+    def _active_wal_path(self):
+        return os.path.join(self.wal_directory, _ACTIVE_WAL_NAME)
+
+    def _new_segment_path(self):
+        self._segment_counter += 1
+        return os.path.join(
+            self.wal_directory,
+            f'ingestion.{int(time.time() * 1000):015d}'
+            f'{self._segment_counter:06d}.segment')
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _lock_wal_directory(self):
+        lock_file = open(os.path.join(self.wal_directory, _LOCK_NAME), 'a')
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            raise RuntimeError(f'WAL directory {self.wal_directory} is used '
+                               f'by another process')
+        self._lock_file = lock_file
+
+    def _unlock_wal_directory(self):
+        fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+        self._lock_file.close()
+        self._lock_file = None
+
+    def start(self):
+        """Replays un-flushed WAL entries and starts the background flusher
+
+        Raises:
+            RuntimeError: WAL directory is used by another process
+        """
+        if self.is_running():
+            return
+        os.makedirs(self.wal_directory, exist_ok=True)
+        # The active WAL of a running process must not be replayed
+        self._lock_wal_directory()
+        # A WAL left behind by a previous process becomes a segment, so it is
+        # replayed together with the segments that were never written.
+        if os.path.exists(self._active_wal_path):
+            os.rename(self._active_wal_path, self._new_segment_path())
+        self._write_segments()
+
+        self._stopped.clear()
+        self._wal_file = open(self._active_wal_path, 'a', encoding='utf-8')
+        self._thread = threading.Thread(target=self._run,
+                                        name='ingestion-buffer-flusher',
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the background flusher and flushes the remaining rows"""
+        if not self.is_running():
+            return
+        self._stopped.set()
+        self._flush_requested.set()
+        self._thread.join()
+        self._thread = None
+        self.flush()
+        with self._lock:
+            self._wal_file.close()
+            self._wal_file = None
+        self._unlock_wal_directory()
+
+    def append(self, row: dict):
+        """Appends a row to the WAL and to the in-process queue
+
+        Arguments:
+            row {dict} -- json serializable row
+        """
+        line = json.dumps(row) + '\n'
+        with self._lock:
+            if self._wal_file is None:
+                raise RuntimeError('Ingestion buffer has not been started')
+            self._wal_file.write(line)
+            self._wal_file.flush()
+            if self.fsync:
+                os.fsync(self._wal_file.fileno())
+            self._pending.append(row)
+            queue_size = len(self._pending)
+
+        if queue_size >= self.flush_size:
+            self._flush_requested.set()
+
+    def flush(self):
+        """Drains the queue and writes all un-flushed segments
+
+        Returns:
+            int -- number of rows that have been written
+        """
+        with self._flush_lock:
+            segment, rows = None, []
+            with self._lock:
+                if self._pending and self._wal_file is not None:
+                    rows, self._pending = self._pending, []
+                    self._wal_file.close()
+                    segment = self._new_segment_path()
+                    os.rename(self._active_wal_path, segment)
+                    self._wal_file = open(self._active_wal_path,
+                                          'a',
+                                          encoding='utf-8')
+
+            return self._write_segments({segment: rows} if segment else {})
+
+    def _write_segments(self, queued_segments: dict = None):
+        # Segments are written oldest first, the rows of a segment that has
+        # just been rotated are still in memory and do not need to be read
+        written = 0
+        for segment in sorted(
+                glob.glob(os.path.join(self.wal_directory,
+                                       _SEGMENT_PATTERN))):
+            rows = (queued_segments or {}).get(segment)
+            if rows is None:
+                rows = self._read_segment(segment)
+            written += self._write_segment(segment, rows)
+        return written
+
+    def _write_segment(self, segment: str, rows: list):
+        try:
+            if rows:
+                self.writer(rows)
+            os.remove(segment)
+            return len(rows)
+        except self.unwritable_errors as err:
+            # Retrying would fail again, the segment is kept for inspection
+            os.rename(segment, segment + _FAILED_SEGMENT_SUFFIX)
+            _logger.error(f'Moved unwritable ingestion segment {segment} '
+                          f'aside: {err}')
+            return 0
+        except Exception as err:
+            # The segment is kept on disk and retried on the next flush
+            _logger.warning(f'Unable to flush ingestion segment {segment}: '
+                            f'{err}')
+            return 0
+
+    def _read_segment(self, segment: str):
+        rows = []
+        with open(segment, encoding='utf-8') as segment_file:
+            for line in segment_file:
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    # A torn write at the end of the WAL is skipped
+                    pass
+        return rows
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._flush_requested.wait(self.flush_interval)
+            self._flush_requested.clear()
+            self.flush()
@@ -0,0 +1,165 @@
+"""JSON serialization of the API responses with orjson.
+
+The output is identical to the output of the stdlib encoder of Flask. orjson
+writes floats in the same notation as repr() within the range in which repr()
+does not use an exponent, and writes NaN and Infinity as null. Objects that
+contain other floats are therefore serialized by the stdlib encoder.
+"""
+from datetime import date, datetime
+
+import numpy
+from flask import current_app, has_app_context
+from flask import json as _flask_json
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the stdlib encoder is used instead
+    orjson = None
+
+
+class JSONEncoder(_flask_json.JSONEncoder):
+    """The JSON encoder of Flask, extended with support for numpy scalars"""
+    def default(self, o):
+        if isinstance(o, numpy.generic):
+            return o.item()
+        return _flask_json.JSONEncoder.default(self, o)
+
+
+_WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+_MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep',
+           'Oct', 'Nov', 'Dec')
+
+
+def _http_date(obj):
+    # Same format as werkzeug.http.http_date, which the JSON encoder of Flask
+    # uses for dates
+    return '%s, %02d %s %d %02d:%02d:%02d GMT' % (
+        _WEEKDAYS[obj.weekday()], obj.day, _MONTHS[obj.month - 1], obj.year,
+        getattr(obj, 'hour', 0), getattr(obj, 'minute', 0),
+        getattr(obj, 'second', 0))
+
+
+def _default(obj):
+    if isinstance(obj, datetime):
+        if obj.utcoffset():
+            obj = obj.replace(tzinfo=None) - obj.utcoffset()
+        return _http_date(obj)
+    if isinstance(obj, date):
+        return _http_date(obj)
+    if isinstance(obj, numpy.generic):
+        return obj.item()
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f'Type {type(obj).__name__} is not JSON serializable')
+
+
+# repr() writes floats in this range without an exponent
+_MIN_PLAIN_FLOAT = 1e-4
+_MAX_PLAIN_FLOAT = 1e16
+_NON_FLOAT_TYPES = frozenset((str, int, bool, type(None), datetime, date))
+
+
+def _has_float_notation_differences(obj):
+    """Checks if an object contains floats that orjson writes differently
+    than the stdlib encoder, e.g. 1e-05, NaN or Infinity
+
+    Arguments:
+        obj {object} -- object to check
+
+    Returns:
+        bool -- True if the object contains such a float
+    """
+    values = [obj]
+    # The list grows while it is iterated
+    for value in values:
+        value_type = type(value)
+        if value_type is dict:
+            values.extend(value.values())
+        elif value_type is list:
+            values.extend(value)
+        elif value_type in _NON_FLOAT_TYPES:
+            continue
+        elif isinstance(value, (float, numpy.floating)):
+            # NaN fails every comparison
+            if value and not \
+                    _MIN_PLAIN_FLOAT <= abs(value) < _MAX_PLAIN_FLOAT:
+                return True
+        elif isinstance(value, (dict, list, tuple)):
+            values.extend(value.values() if isinstance(value, dict) else value)
+    return False
+
+
+def _get_config(name: str, default):
+    return current_app.config.get(name, default) if has_app_context() \
+        else default
+
+
+def _fast_dumps(obj):
+    """Serializes an object with orjson
+
+    Arguments:
+        obj {object} -- object to serialize
+
+    Returns:
+        bytes -- the compact JSON, None if orjson cannot serialize the object
+        as the stdlib encoder would
+    """
+    if orjson is None or _has_float_notation_differences(obj):
+        return None
+    # numpy scalars are passed to _default, which converts them as the
+    # stdlib encoder does
+    option = orjson.OPT_PASSTHROUGH_DATETIME
+    if _get_config('JSON_SORT_KEYS', True):
+        option |= orjson.OPT_SORT_KEYS
+    try:
+        encoded = orjson.dumps(obj, default=_default, option=option)
+    except TypeError:
+        # e.g. non string keys or integers that exceed 64 bits
+        return None
+    # orjson does not escape non ASCII characters
+    if _get_config('JSON_AS_ASCII', True):
+        try:
+            encoded.decode('ascii')
+        except UnicodeDecodeError:
+            return None
+    return encoded
+
+
+def dumps(obj):
+    """Serializes an object to compact JSON
+
+    Arguments:
+        obj {object} -- object to serialize
+
+    Returns:
+        str -- the JSON
+    """
+    encoded = _fast_dumps(obj)
+    if encoded is not None:
+        return encoded.decode('utf-8')
+    if has_app_context():
+        return _flask_json.dumps(obj, separators=(',', ':'))
+    return _flask_json.dumps(obj, cls=JSONEncoder, separators=(',', ':'))
+
+
+def jsonify(*args, **kwargs):
+    """A drop-in replacement of flask.jsonify that serializes with orjson.
+    Pretty printed responses and objects that orjson cannot serialize as
+    configured are serialized by flask.jsonify.
+
+    Returns:
+        Response -- the JSON response
+    """
+    if current_app.config['JSONIFY_PRETTYPRINT_REGULAR'] or \
+            current_app.debug:
+        return _flask_json.jsonify(*args, **kwargs)
+    if args and kwargs:
+        raise TypeError(
+            'jsonify() behavior undefined when passed both args and kwargs')
+    data = args[0] if len(args) == 1 else args or kwargs
+
+    encoded = _fast_dumps(data)
+    if encoded is None:
+        return _flask_json.jsonify(data)
+    return current_app.response_class(
+        encoded + b'\n', mimetype=current_app.config['JSONIFY_MIMETYPE'])
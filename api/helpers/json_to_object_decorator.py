@@ -2,7 +2,7 @@
 # a json object
 import json
 from collections import namedtuple
-from functools import wraps
+from functools import lru_cache, wraps
 
 from flask import request
 
@@ -22,8 +22,27 @@ def convert_input_to(class_):
 # inspired by https://stackoverflow.com/a/15882054
 
 
+@lru_cache(maxsize=256)
+def _namedtuple_class(type_name: str, keys: tuple):
+    # Payloads of the same endpoint share their keys, so the namedtuple
+    # classes are created once and reused
+    return namedtuple(type_name, keys)
+
+
 def _json_object_hook(data):
-    return namedtuple(type(data).__name__, data.keys())(*data.values())
+    return _namedtuple_class(type(data).__name__,
+                             tuple(data.keys()))(*data.values())
+
+
+def _to_tuple(data):
+    """Converts an already parsed JSON payload to namedtuples"""
+    if isinstance(data, dict):
+        return _json_object_hook(
+            {key: _to_tuple(value)
+             for key, value in data.items()})
+    if isinstance(data, list):
+        return [_to_tuple(value) for value in data]
+    return data
 
 
 def convert_input_to_tuple(fn):
@@ -35,14 +54,11 @@ def convert_input_to_tuple(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
         data = args[0].api.payload
-        try:
-            kwargs['tupled_output'] = json.loads(data,
-                                                 object_hook=_json_object_hook)
-            return fn(*args, **kwargs)
-        except Exception:
-            data = json.dumps(data)
+        if isinstance(data, (str, bytes)):
             kwargs['tupled_output'] = json.loads(data,
                                                  object_hook=_json_object_hook)
-            return fn(*args, **kwargs)
+        else:
+            kwargs['tupled_output'] = _to_tuple(data)
+        return fn(*args, **kwargs)
 
     return wrapper
@@ -0,0 +1,104 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+_CURSOR_DATE_FORMATS = ('%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%d %H:%M:%S')
+
+
+def encode_cursor(created_date, id: int):
+    """Creates an opaque cursor that points after the given row
+
+    Arguments:
+        created_date {datetime} -- creation date of the last row of a page
+        id {int} -- id of the last row of a page
+
+    Returns:
+        str -- url safe cursor
+    """
+    if isinstance(created_date, datetime):
+        created_date = created_date.strftime(_CURSOR_DATE_FORMATS[0])
+    return base64.urlsafe_b64encode(
+        json.dumps([str(created_date), id]).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str):
+    """Decodes a cursor created by encode_cursor
+
+    Arguments:
+        cursor {str} -- url safe cursor
+
+    Raises:
+        ValueError: Invalid cursor
+
+    Returns:
+        tuple -- creation date and id of the row the cursor points after
+    """
+    try:
+        created_date, id = json.loads(
+            base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if isinstance(id, bool) or not isinstance(id, int):
+            raise ValueError
+        for date_format in _CURSOR_DATE_FORMATS:
+            try:
+                return datetime.strptime(created_date, date_format), id
+            except ValueError:
+                pass
+    except (binascii.Error, TypeError, ValueError):
+        pass
+    raise ValueError('Invalid cursor provided')
+
+
+def apply_keyset(query, created_date_field, id_field, after: tuple,
+                 descending: bool):
+    """Orders a query by (created_date, id) and continues after the given
+    row. The condition is a range on created_date, so every page is an index
+    range scan regardless of its depth.
+
+    Arguments:
+        query {ModelSelect} -- query to paginate
+        created_date_field {Field} -- created_date field of the model
+        id_field {Field} -- id field of the model
+        after {tuple} -- creation date and id of the last row of the previous
+        page, None for the first page
+        descending {bool} -- True to return the newest rows first
+
+    Returns:
+        ModelSelect -- the paginated query
+    """
+    if descending:
+        query = query.order_by(created_date_field.desc(), id_field.desc())
+    else:
+        query = query.order_by(created_date_field.asc(), id_field.asc())
+    if after is None:
+        return query
+
+    created_date, id = after
+    if descending:
+        return query.where(created_date_field <= created_date,
+                           (created_date_field < created_date) |
+                           (id_field < id))
+    return query.where(created_date_field >= created_date,
+                       (created_date_field > created_date) | (id_field > id))
+
+
+def apply_cursor(query, created_date_field, id_field, cursor: str,
+                 descending: bool):
+    """Orders a query by (created_date, id) and continues after the row the
+    cursor points to
+
+    Arguments:
+        query {ModelSelect} -- query to paginate
+        created_date_field {Field} -- created_date field of the model
+        id_field {Field} -- id field of the model
+        cursor {str} -- cursor of the previous page, None for the first page
+        descending {bool} -- True to return the newest rows first
+
+    Raises:
+        ValueError: Invalid cursor
+
+    Returns:
+        ModelSelect -- the paginated query
+    """
+    return apply_keyset(query, created_date_field, id_field,
+                        decode_cursor(cursor) if cursor else None, descending)
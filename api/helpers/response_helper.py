@@ -1,6 +1,9 @@
 from api.settings import FLASK_API_VERSION
 
+from .json_provider import dumps
+
 api_version = FLASK_API_VERSION if FLASK_API_VERSION else "1.0.0"
+_STREAM_BUFFER_SIZE = 64 * 1024
 
 
 class ErrorObject:
@@ -30,13 +33,49 @@ class SuccessObject:
     def create_response(self,
                         status_code,
                         data: object,
-                        return_count: bool = False):
+                        return_count: bool = False,
+                        next_cursor: str = None):
         response = {"apiVersion": api_version, "data": data}
 
         if return_count:
             response['count'] = len(data)
+        # The cursor of the next page is omitted on the last page
+        if next_cursor is not None:
+            response['next_cursor'] = next_cursor
         return response
 
+    def create_streamed_response(self, data, return_count: bool = False):
+        """Creates the response incrementally, only one item of data is
+        serialized at a time.
+
+        Arguments:
+            data {iterable} -- items of the response, consumed lazily
+
+        Keyword Arguments:
+            return_count {bool} -- adds the number of items to the response
+            (default: {False})
+
+        Returns:
+            generator -- chunks of the JSON encoded response
+        """
+        buffer = ['{"apiVersion":%s,"data":[' % dumps(api_version)]
+        buffered_size = 0
+        count = 0
+        for item in data:
+            encoded_item = dumps(item)
+            buffer.append(',' + encoded_item if count else encoded_item)
+            buffered_size += len(encoded_item)
+            count += 1
+            # Items are sent in chunks to avoid a write for every item
+            if buffered_size >= _STREAM_BUFFER_SIZE:
+                yield ''.join(buffer)
+                buffer, buffered_size = [], 0
+        buffer.append(']')
+        if return_count:
+            buffer.append(',"count":%d' % count)
+        buffer.append('}')
+        yield ''.join(buffer)
+
 
 def remove_items_from_dict(dictionary: dict, items_to_remove: list):
     """Helper to delete elements from a dictionary
@@ -1,3 +1,4 @@
+import calendar
 import json
 from collections import namedtuple
 from datetime import date, datetime
@@ -60,6 +61,44 @@ def to_rfc3339_datetime(when: str = 'now', obj_to_convert: datetime = None):
         )
 
 
+def to_epoch(obj_to_convert: datetime):
+    """Converts a UTC datetime to the number of seconds since the epoch
+
+    Arguments:
+        obj_to_convert {datetime} -- UTC datetime to convert
+
+    Returns:
+        int -- seconds since the epoch, None if no datetime is given
+    """
+    if obj_to_convert is None:
+        return None
+    return calendar.timegm(obj_to_convert.utctimetuple())
+
+
+def to_columns(column_names: list, rows: list, epoch_columns: tuple = ()):
+    """Converts rows of tuples to one list of values per column
+
+    Arguments:
+        column_names {list} -- names of the columns of the tuples
+        rows {list} -- tuples containing the values of a row
+
+    Keyword Arguments:
+        epoch_columns {tuple} -- names of the datetime columns to convert to
+        seconds since the epoch (default: {()})
+
+    Returns:
+        dict -- a list of values per column name
+    """
+    columns = {}
+    values_per_column = zip(*rows) if rows else [()] * len(column_names)
+    for column_name, values in zip(column_names, values_per_column):
+        if column_name in epoch_columns:
+            columns[column_name] = [to_epoch(value) for value in values]
+        else:
+            columns[column_name] = list(values)
+    return columns
+
+
 def _json_object_hook(d):
     return namedtuple(type(d).__name__, d.keys())(*d.values())
 
@@ -72,3 +72,32 @@ def validate_string_int(input: str):
         return int_val
     except ValueError:
         raise ValueError("Input is not of type int")
+
+
+def validate_datetimeformat(
+        variable_name: str, datetime_text: str,
+        format: str = '%Y-%m-%d %H:%M:%S'):
+    """Validates that the given parameter is of a specific datetime format
+
+    Arguments:
+        variable_name {str} -- Name of variable to check
+        datetime_text {str} -- Value of the variable
+
+    Keyword Arguments:
+        format {str} -- Datetime format to check
+        (default: {'%Y-%m-%d %H:%M:%S'})
+    """
+    import datetime as dt
+
+    if isinstance(datetime_text, dt.datetime):
+        return
+    if not datetime_text or not isinstance(datetime_text, str):
+        raise ValueError(
+            f"Input parameter {variable_name} cannot be null or empty,"
+            f" expected format is YYYY-MM-DD HH:MM:SS")
+    try:
+        dt.datetime.strptime(datetime_text, format)
+    except ValueError:
+        raise ValueError(
+            f"Incorrect datetime format for parameter {variable_name},"
+            f" expected format is YYYY-MM-DD HH:MM:SS")
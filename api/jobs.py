@@ -1,11 +1,22 @@
+import logging
+from functools import wraps
+
 from apscheduler.schedulers.background import BackgroundScheduler
 
+from api.models import Weather, close_replicas, database
+from api.services import ArchiveService as _ArchiveService
 from api.services import DataSourceDataService as _DataSourceDataService
+from api.services import DataSourceTokenService as _DataSourceTokenService
+from api.services import DataVersionService as _DataVersionService
 from api.services import WeatherService as _WeatherService
 from api.services import ForecastService as _ForecastService
+from api.services.data_version import WEATHER_VERSION_NAME
 # from api.wrapper.browser.web import AutomatedWebDriver, WebDriverType
 
-from .settings import NUMBER_OF_BACKGROUND_WORKERS
+from .settings import (ARCHIVE_AFTER_DAYS, ARCHIVE_ENABLED,
+                       NUMBER_OF_BACKGROUND_WORKERS, PARTITION_MONTHS_AHEAD,
+                       PARTITION_RETENTION_ACTION, PARTITION_RETENTION_MONTHS,
+                       PARTITIONING_ENABLED, TOKEN_USAGE_FLUSH_INTERVAL)
 
 executors = {
     'default': {
@@ -15,22 +26,72 @@ executors = {
 }
 
 bg_scheduler = BackgroundScheduler(executors=executors)
+_logger = logging.getLogger(__name__)
+
+
+def with_connection(fn):
+    """Borrows a connection from the connection pool for the duration of a
+    job and returns it afterwards, jobs run in their own worker threads
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            with database.connection_context():
+                return fn(*args, **kwargs)
+        finally:
+            close_replicas()
+
+    return wrapper
 
 
 @bg_scheduler.scheduled_job('cron', minute='*/10')
+@with_connection
 def get_weather():
     _WeatherService.get_current_weather(_WeatherService)
 
 
 @bg_scheduler.scheduled_job('cron', minute='0', hour='20')
+@with_connection
 def get_weather_forecast():
     _DataSourceDataService.get_weather_forecast_5d_3h(_DataSourceDataService)
 
 
 @bg_scheduler.scheduled_job('cron', minute='0', hour='20', day_of_week='sat')
+@with_connection
 def create_next_week_forecast():
     _ForecastService.create_next_week_prediction(_ForecastService)
 
+
+@bg_scheduler.scheduled_job('interval', seconds=TOKEN_USAGE_FLUSH_INTERVAL)
+@with_connection
+def flush_token_usage():
+    _DataSourceTokenService.flush_token_usage(_DataSourceTokenService)
+
+
+if ARCHIVE_ENABLED:
+    @bg_scheduler.scheduled_job('cron', minute='0', hour='3')
+    @with_connection
+    def archive_old_data():
+        result = _ArchiveService.archive_old_data(_ArchiveService,
+                                                  ARCHIVE_AFTER_DAYS)
+        _logger.info(f'Archived old data: {result}')
+
+
+if PARTITIONING_ENABLED:
+    @bg_scheduler.scheduled_job('cron', minute='30', hour='3')
+    @with_connection
+    def maintain_partitions():
+        from api.models.partition import \
+            maintain_partitions as _maintain_partitions
+        result = _maintain_partitions(database, PARTITION_MONTHS_AHEAD,
+                                      PARTITION_RETENTION_MONTHS,
+                                      PARTITION_RETENTION_ACTION)
+        # Dropped weather partitions change the weather listing
+        if result.get(Weather._meta.table_name, {}).get('dropped'):
+            _DataVersionService.bump_version(_DataVersionService,
+                                             WEATHER_VERSION_NAME)
+        _logger.info(f'Maintained partitions: {result}')
+
 # @bg_scheduler.scheduled_job('cron', minute='*/10')
 # def get_clients():
 #     from api.dto import CreateDataSourceDataDto
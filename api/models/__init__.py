@@ -1,13 +1,69 @@
-from .base import Base, MySQLDatabase, database
+from peewee import MySQLDatabase
+
+from .base import (Base, bind_to_read_database, close_replicas,
+                   configure_replicas, database, replica_reads,
+                   set_read_your_writes, use_replica)
 from .data_source import DataSource
 from .data_source_data import DataSourceData
+from .data_source_data_rollup import DataSourceDataDaily, DataSourceDataHourly
 from .data_source_token import DataSourceToken
+from .data_version import DataVersion
 # from .role import Role
 from .user import User
 from .weather import Forecast, Weather
 from .forecast import CrowdForecast
 
 
+def _get_migrations(migrator):
+    """Returns the migrations to apply to existing databases
+
+    Arguments:
+        migrator {MySQLMigrator} -- migrator of the database
+
+    Returns:
+        list -- migration operations, in the order they should be applied
+    """
+    from peewee import (BigIntegerField, CharField, DateTimeField,
+                        FloatField, IntegerField)
+    return [
+        migrator.rename_column('data_source_data', 'creation_date',
+                               'created_date'),
+        migrator.add_column('data_source_data', 'idempotency_key',
+                            CharField(max_length=64, null=True)),
+        migrator.add_index('data_source_data',
+                           ('data_source_id', 'idempotency_key'), True),
+        migrator.add_index('data_source_data',
+                           ('data_source_id', 'created_date'), False),
+        migrator.add_index('weather',
+                           ('weather_forecast_type', 'created_date'), False),
+        migrator.add_column('weather', 'measured_date',
+                            DateTimeField(null=True)),
+        migrator.add_column('weather', 'temp', FloatField(null=True)),
+        migrator.add_column('weather', 'temp_min', FloatField(null=True)),
+        migrator.add_column('weather', 'temp_max', FloatField(null=True)),
+        migrator.add_column('weather', 'humidity', IntegerField(null=True)),
+        migrator.add_column('weather', 'pressure', IntegerField(null=True)),
+        migrator.add_column('weather', 'wind_speed', FloatField(null=True)),
+        migrator.add_column('weather', 'clouds', IntegerField(null=True)),
+        migrator.add_column('weather', 'rain_1h', FloatField(null=True)),
+        migrator.add_column('weather', 'rain_3h', FloatField(null=True)),
+        migrator.add_column('weather', 'weather_main',
+                            CharField(max_length=50, null=True)),
+        migrator.add_column('weather', 'weather_description',
+                            CharField(max_length=255, null=True)),
+        migrator.add_index('weather',
+                           ('weather_forecast_type', 'measured_date'), False),
+        migrator.add_index('data_source_data', ('created_date', ), False),
+        migrator.add_index('weather', ('created_date', ), False),
+        migrator.add_column('data_source_data_hourly',
+                            'sum_of_occasional_clients',
+                            BigIntegerField(default=0)),
+        migrator.add_column('data_source_data_daily',
+                            'sum_of_occasional_clients',
+                            BigIntegerField(default=0)),
+    ]
+
+
 def create_tables(database: MySQLDatabase, migrations: bool = False):
     """Creates database tables
     
@@ -15,8 +71,8 @@ def create_tables(database: MySQLDatabase, migrations: bool = False):
         database {MySQLDatabase} -- MySQL database connection
     
     Keyword Arguments:
-        migrations {bool} -- Run migrations (in this case only a rename of \
-            a column is run) (default: {False})
+        migrations {bool} -- Run the migrations of _get_migrations \
+            (default: {False})
     
     Raises:
         ValueError: Provide a MySQLDatabase class
@@ -27,13 +83,13 @@ def create_tables(database: MySQLDatabase, migrations: bool = False):
             if migrations:
                 from playhouse.migrate import MySQLMigrator, migrate
                 migrator = MySQLMigrator(database)
-                try:
-                    migrate(
-                        migrator.rename_column('data_source_data',
-                                               'creation_date',
-                                               'created_date'))
-                except:
-                    pass
+                # Every migration is attempted, migrations that have already
+                # been applied fail and are skipped
+                for migration in _get_migrations(migrator):
+                    try:
+                        migrate(migration)
+                    except:
+                        pass
     else:
         raise ValueError(
             "Please provide a database class that is an instance of \
@@ -1,4 +1,4 @@
-from peewee import (DateTimeField, ForeignKeyField, IntegerField,
+from peewee import (CharField, DateTimeField, ForeignKeyField, IntegerField,
                     PrimaryKeyField)
 
 from .data_source import DataSource
@@ -9,4 +9,13 @@ class DataSourceData(Base):
     id = PrimaryKeyField()
     data_source = ForeignKeyField(DataSource, related_name='send_by')
     no_of_clients = IntegerField()
-    created_date = DateTimeField()
+    created_date = DateTimeField(index=True)
+    # Optional key provided by the client to make retries idempotent
+    idempotency_key = CharField(max_length=64, null=True)
+
+    class Meta:
+        indexes = (
+            (('data_source', 'idempotency_key'), True),
+            # Readings are queried per data source within a time range
+            (('data_source', 'created_date'), False),
+        )
@@ -0,0 +1,45 @@
+from peewee import (BigIntegerField, DateTimeField, ForeignKeyField,
+                    IntegerField, PrimaryKeyField)
+
+from .data_source import DataSource
+from .base import Base
+
+
+class DataSourceDataHourly(Base):
+    """Aggregated readings of a data source per hour, bucket contains the
+    start of the hour"""
+    id = PrimaryKeyField()
+    data_source = ForeignKeyField(DataSource, related_name='hourly_data')
+    bucket = DateTimeField()
+    no_of_readings = IntegerField(default=0)
+    sum_of_clients = BigIntegerField(default=0)
+    # Sum of the clients of every reading minus the clients that are always
+    # connected, at least 0 per reading
+    sum_of_occasional_clients = BigIntegerField(default=0)
+    min_of_clients = IntegerField()
+    max_of_clients = IntegerField()
+
+    class Meta:
+        indexes = (
+            (('data_source', 'bucket'), True),
+        )
+
+
+class DataSourceDataDaily(Base):
+    """Aggregated readings of a data source per day, bucket contains the
+    start of the day"""
+    id = PrimaryKeyField()
+    data_source = ForeignKeyField(DataSource, related_name='daily_data')
+    bucket = DateTimeField()
+    no_of_readings = IntegerField(default=0)
+    sum_of_clients = BigIntegerField(default=0)
+    # Sum of the clients of every reading minus the clients that are always
+    # connected, at least 0 per reading
+    sum_of_occasional_clients = BigIntegerField(default=0)
+    min_of_clients = IntegerField()
+    max_of_clients = IntegerField()
+
+    class Meta:
+        indexes = (
+            (('data_source', 'bucket'), True),
+        )
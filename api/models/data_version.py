@@ -0,0 +1,13 @@
+from peewee import CharField, DateTimeField, IntegerField
+
+from .base import Base
+
+
+class DataVersion(Base):
+    """A version counter per data set (usually a table). The version is
+    bumped on every change, so other processes can detect changes with a
+    single primary key lookup.
+    """
+    name = CharField(primary_key=True, max_length=50)
+    version = IntegerField(default=0)
+    updated_date = DateTimeField()
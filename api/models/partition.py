@@ -0,0 +1,233 @@
+"""Monthly RANGE partitioning of the tables that grow with time.
+
+MySQL requires the partitioning column in every unique key and does not
+support foreign keys on partitioned tables. Partitioning a table therefore
+drops its foreign keys, extends the primary key to (id, created_date) and
+adds created_date to every other unique key.
+"""
+from datetime import datetime
+
+from peewee import MySQLDatabase
+
+PARTITIONED_TABLES = ('data_source_data', 'weather')
+_MAX_PARTITION = 'pmax'
+_MAINTENANCE_LOCK = 'partition_maintenance'
+
+
+def _add_months(month: datetime, months: int):
+    month_index = month.year * 12 + month.month - 1 + months
+    return datetime(month_index // 12, month_index % 12 + 1, 1)
+
+
+def _get_month_start(day: datetime):
+    return datetime(day.year, day.month, 1)
+
+
+def _get_partition_name(month: datetime):
+    return f'p{month:%Y%m}'
+
+
+def _get_partition_month(partition_name: str):
+    return datetime.strptime(partition_name[1:], '%Y%m')
+
+
+def _get_partition_definition(month: datetime):
+    # A partition contains the rows of its month and, for the first
+    # partition, all rows before it
+    return (f'PARTITION {_get_partition_name(month)} VALUES LESS THAN '
+            f"(TO_DAYS('{_add_months(month, 1):%Y-%m-%d}'))")
+
+
+def get_partitions(database: MySQLDatabase, table_name: str):
+    """Retrieves the partitions of a table
+
+    Arguments:
+        database {MySQLDatabase} -- MySQL database connection
+        table_name {str} -- name of the table
+
+    Returns:
+        list -- names of the partitions in ascending order, empty if the
+        table is not partitioned
+    """
+    cursor = database.execute_sql(
+        'SELECT PARTITION_NAME FROM information_schema.PARTITIONS '
+        'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s '
+        'AND PARTITION_NAME IS NOT NULL '
+        'ORDER BY PARTITION_ORDINAL_POSITION', (table_name, ))
+    return [partition_name for partition_name, in cursor.fetchall()]
+
+
+def _get_foreign_keys(database: MySQLDatabase, table_name: str):
+    cursor = database.execute_sql(
+        'SELECT CONSTRAINT_NAME FROM information_schema.TABLE_CONSTRAINTS '
+        'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s '
+        "AND CONSTRAINT_TYPE = 'FOREIGN KEY'", (table_name, ))
+    return [constraint_name for constraint_name, in cursor.fetchall()]
+
+
+def _get_unique_indexes(database: MySQLDatabase, table_name: str):
+    cursor = database.execute_sql(
+        'SELECT INDEX_NAME, COLUMN_NAME FROM information_schema.STATISTICS '
+        'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s '
+        "AND NON_UNIQUE = 0 AND INDEX_NAME != 'PRIMARY' "
+        'ORDER BY INDEX_NAME, SEQ_IN_INDEX', (table_name, ))
+    unique_indexes = {}
+    for index_name, column_name in cursor.fetchall():
+        unique_indexes.setdefault(index_name, []).append(column_name)
+    return unique_indexes
+
+
+def partition_table(database: MySQLDatabase,
+                    table_name: str,
+                    months_ahead: int = 3):
+    """Converts a table to monthly RANGE partitions on created_date. The
+    table is rebuilt, so this can take a while on large tables.
+
+    Arguments:
+        database {MySQLDatabase} -- MySQL database connection
+        table_name {str} -- name of the table
+
+    Keyword Arguments:
+        months_ahead {int} -- number of future months to create partitions
+        for (default: {3})
+
+    Returns:
+        bool -- False if the table was already partitioned
+    """
+    if get_partitions(database, table_name):
+        return False
+
+    first_date = database.execute_sql(
+        f'SELECT MIN(created_date) FROM `{table_name}`').fetchone()[0]
+    current_month = _get_month_start(datetime.utcnow())
+    month = _get_month_start(first_date or current_month)
+    partition_definitions = []
+    while month <= _add_months(current_month, months_ahead):
+        partition_definitions.append(_get_partition_definition(month))
+        month = _add_months(month, 1)
+    partition_definitions.append(
+        f'PARTITION {_MAX_PARTITION} VALUES LESS THAN MAXVALUE')
+
+    for foreign_key in _get_foreign_keys(database, table_name):
+        database.execute_sql(
+            f'ALTER TABLE `{table_name}` DROP FOREIGN KEY `{foreign_key}`')
+    for index_name, columns in _get_unique_indexes(database,
+                                                   table_name).items():
+        if 'created_date' not in columns:
+            index_columns = ', '.join(f'`{column}`'
+                                      for column in columns + ['created_date'])
+            database.execute_sql(
+                f'ALTER TABLE `{table_name}` DROP INDEX `{index_name}`, '
+                f'ADD UNIQUE INDEX `{index_name}` ({index_columns})')
+    database.execute_sql(
+        f'ALTER TABLE `{table_name}` DROP PRIMARY KEY, '
+        f'ADD PRIMARY KEY (`id`, `created_date`)')
+    database.execute_sql(
+        f'ALTER TABLE `{table_name}` '
+        f'PARTITION BY RANGE (TO_DAYS(`created_date`)) '
+        f'({", ".join(partition_definitions)})')
+    return True
+
+
+def _create_future_partitions(database: MySQLDatabase, table_name: str,
+                              partitions: list, months_ahead: int):
+    monthly_partitions = [
+        partition for partition in partitions if partition != _MAX_PARTITION
+    ]
+    month = _add_months(_get_partition_month(monthly_partitions[-1]), 1)
+    last_month = _add_months(_get_month_start(datetime.utcnow()),
+                             months_ahead)
+    partition_definitions = []
+    while month <= last_month:
+        partition_definitions.append(_get_partition_definition(month))
+        month = _add_months(month, 1)
+    if partition_definitions:
+        partition_definitions.append(
+            f'PARTITION {_MAX_PARTITION} VALUES LESS THAN MAXVALUE')
+        database.execute_sql(
+            f'ALTER TABLE `{table_name}` REORGANIZE PARTITION '
+            f'{_MAX_PARTITION} INTO ({", ".join(partition_definitions)})')
+    return len(partition_definitions) - 1 if partition_definitions else 0
+
+
+def _archive_partition(database: MySQLDatabase, table_name: str,
+                       partition_name: str):
+    # The rows of the partition are swapped into an empty, unpartitioned
+    # copy of the table, which is a metadata only operation
+    archive_table_name = f'{table_name}_archive_{partition_name}'
+    database.execute_sql(
+        f'CREATE TABLE `{archive_table_name}` LIKE `{table_name}`')
+    database.execute_sql(
+        f'ALTER TABLE `{archive_table_name}` REMOVE PARTITIONING')
+    database.execute_sql(
+        f'ALTER TABLE `{table_name}` EXCHANGE PARTITION {partition_name} '
+        f'WITH TABLE `{archive_table_name}`')
+    return archive_table_name
+
+
+def maintain_partitions(database: MySQLDatabase,
+                        months_ahead: int = 3,
+                        retention_months: int = 0,
+                        retention_action: str = 'archive'):
+    """Creates the partitions of the coming months and removes the partitions
+    that are older than the retention. Tables that are not partitioned are
+    skipped. Only one process at a time performs the maintenance.
+
+    Arguments:
+        database {MySQLDatabase} -- MySQL database connection
+
+    Keyword Arguments:
+        months_ahead {int} -- number of future months to create partitions
+        for (default: {3})
+        retention_months {int} -- number of months to keep, 0 keeps all
+        partitions (default: {0})
+        retention_action {str} -- 'drop' deletes old partitions, 'archive'
+        moves them to a <table>_archive_<partition> table first
+        (default: {'archive'})
+
+    Raises:
+        ValueError: Unsupported retention action
+
+    Returns:
+        dict -- created, dropped and archived partitions per table
+    """
+    if retention_action not in ('drop', 'archive'):
+        raise ValueError('Unsupported retention action provided')
+
+    result = {}
+    acquired, = database.execute_sql('SELECT GET_LOCK(%s, 0)',
+                                     (_MAINTENANCE_LOCK, )).fetchone()
+    if not acquired:
+        return result
+    try:
+        for table_name in PARTITIONED_TABLES:
+            partitions = get_partitions(database, table_name)
+            if not partitions:
+                continue
+            table_result = result[table_name] = {
+                'created':
+                _create_future_partitions(database, table_name, partitions,
+                                          months_ahead),
+                'dropped': [],
+                'archived': []
+            }
+            if not retention_months:
+                continue
+
+            oldest_month_to_keep = _add_months(
+                _get_month_start(datetime.utcnow()), -retention_months)
+            expired_partitions = [
+                partition for partition in partitions
+                if partition != _MAX_PARTITION and
+                _get_partition_month(partition) < oldest_month_to_keep
+            ]
+            for partition in expired_partitions:
+                if retention_action == 'archive':
+                    table_result['archived'].append(
+                        _archive_partition(database, table_name, partition))
+                database.execute_sql(
+                    f'ALTER TABLE `{table_name}` DROP PARTITION {partition}')
+                table_result['dropped'].append(partition)
+    finally:
+        database.execute_sql('SELECT RELEASE_LOCK(%s)', (_MAINTENANCE_LOCK, ))
+    return result
@@ -1,5 +1,6 @@
 from enum import Enum
-from peewee import CharField, DateTimeField, PrimaryKeyField, ForeignKeyField
+from peewee import (CharField, DateTimeField, FloatField, ForeignKeyField,
+                    IntegerField, PrimaryKeyField)
 from playhouse.mysql_ext import JSONField
 
 from .data_source import DataSource
@@ -8,10 +9,34 @@ from .base import Base
 
 class Weather(Base):
     id = PrimaryKeyField()
-    created_date = DateTimeField()
+    created_date = DateTimeField(index=True)
     data = JSONField()
     data_source = ForeignKeyField(DataSource, related_name='send_by')
     weather_forecast_type = CharField()
+    # Fields of the current weather that are extracted from data when it is
+    # stored, they are empty for forecasts
+    measured_date = DateTimeField(null=True)
+    temp = FloatField(null=True)
+    temp_min = FloatField(null=True)
+    temp_max = FloatField(null=True)
+    humidity = IntegerField(null=True)
+    pressure = IntegerField(null=True)
+    wind_speed = FloatField(null=True)
+    clouds = IntegerField(null=True)
+    rain_1h = FloatField(null=True)
+    rain_3h = FloatField(null=True)
+    weather_main = CharField(max_length=50, null=True)
+    weather_description = CharField(max_length=255, null=True)
+
+    class Meta:
+        indexes = (
+            # Weather data is queried per forecast type within a time range
+            (('weather_forecast_type', 'created_date'), False),
+            # The typed columns are read per forecast type by measured_date,
+            # the other typed columns are only selected, never filtered or
+            # sorted on, so they are not indexed
+            (('weather_forecast_type', 'measured_date'), False),
+        )
 
 
 class Forecast(Enum):
@@ -10,6 +10,7 @@ from api.routes.index import api as index_api
 # data generated from the data source
 from api.routes.data_source_data import api as data_source_data_api
 from api.routes.forecast import api as forecast_api
+from api.routes.monitoring import api as monitoring_api
 from api.settings import (FLASK_API_VERSION, SWAGGER_DOC_ENDPOINT, GET_PATH,
                           FLASK_APP_NAME)
 
@@ -47,6 +48,7 @@ api.add_namespace(login_api)
 api.add_namespace(data_source_data_api)
 # api.add_namespace(assets_api)
 api.add_namespace(forecast_api)
+api.add_namespace(monitoring_api)
 
 SUPPORTED_OAUTH_PROVIDERS = [Google, GitHub]
 
@@ -1,10 +1,9 @@
 from http import HTTPStatus
 
-from flask import jsonify
 from flask_restplus import Namespace, Resource, fields
-from flask_jwt_extended import get_jwt_identity
 
 from api.helpers import (ErrorObject, SuccessObject, convert_input_to_tuple,
+                         get_current_identity, jsonify,
                          jwt_required_extended, check_for)
 from api.services import (DataSourceService as _DataSourceService,
                           DataSourceTokenService as _DataSourceTokenService)
@@ -62,7 +61,7 @@ class AllDataSourcesResources(Resource):
     @check_for("User")
     def post(self, **kwargs):
         """Creates a new data source"""
-        token = get_jwt_identity()
+        token = get_current_identity()
         try:
             return jsonify(
                 SuccessObject.create_response(
@@ -94,7 +93,7 @@ class SingleDataSourceResource(Resource):
     @check_for("User")
     def post(self, data_source_id):
         """Creates a token for data source"""
-        token = get_jwt_identity()
+        token = get_current_identity()
         try:
             return jsonify(
                 SuccessObject.create_response(
@@ -1,21 +1,111 @@
+from functools import wraps
 from http import HTTPStatus
 
-from flask import jsonify, request
-from flask_jwt_extended import get_jwt_identity
+from flask import Response, request, stream_with_context
 from flask_restplus import Namespace, Resource, fields
 
-from api.helpers import (ErrorObject, SuccessObject, convert_input_to_tuple,
-                         jwt_required_extended, check_for)
-from api.services import (DataSourceDataService as _DataSourceDataService,
+from api.helpers import (BINARY_READING_MIMETYPE, ErrorObject, SuccessObject,
+                         convert_input_to_tuple,
+                         get_current_identity, jsonify, jwt_required_extended,
+                         check_for, conditional_get, unpack_binary_readings,
+                         validate_string_bool)
+from api.models import DataSourceData, Weather
+from api.services import (ArchiveService as _ArchiveService,
+                          DataSourceDataService as _DataSourceDataService,
+                          DataSourceDataRollupService as
+                          _DataSourceDataRollupService,
                           WeatherService as _WeatherService)
+from api.services.data_version import WEATHER_VERSION_NAME
+from api.settings import INGESTION_MODE
 
 api = Namespace('data', description="Data related operations")
 
+_ALLOWED_FORMATS = ('rows', 'columnar')
+_ARCHIVED_UNTIL_HEADER = 'X-Archived-Until'
+_ARCHIVED_UNTIL_DESCRIPTION = (
+    'Present when old rows have been archived. Rows created before this '
+    'date (YYYY-mm-dd) are not returned by this endpoint.')
+
 create_data_source_data_dto = api.model('CreateDataSourceDataDto', {
     'no_of_clients':
     fields.Integer(description="number of clients", example=4),
+    'idempotency_key':
+    fields.String(description='Optional key that identifies the reading, a '
+                  'reading with a key that has already been stored is not '
+                  'stored again',
+                  example="2019-12-31T12:00:00"),
 })
 
+data_source_data_reading_dto = api.model('DataSourceDataReadingDto', {
+    'no_of_clients':
+    fields.Integer(description="number of clients", example=4),
+    'created_date':
+    fields.String(description='Time of measurement in YYYY-mm-dd HH:MM:SS '
+                  'format (UTC), defaults to the time of arrival',
+                  example="2019-12-31 12:00:00"),
+    'idempotency_key':
+    fields.String(description='Optional key that identifies the reading, a '
+                  'reading with a key that has already been stored is not '
+                  'stored again',
+                  example="2019-12-31T12:00:00"),
+})
+
+create_data_source_data_batch_dto = api.model(
+    'CreateDataSourceDataBatchDto', {
+        'data':
+        fields.List(fields.Nested(data_source_data_reading_dto),
+                    description="readings to create"),
+    })
+
+
+def _is_columnar_requested():
+    data_format = request.args.get('format') or _ALLOWED_FORMATS[0]
+    if data_format not in _ALLOWED_FORMATS:
+        raise ValueError(
+            HTTPStatus.BAD_REQUEST,
+            'Invalid format value, only "rows" or "columnar" are allowed')
+    return data_format == _ALLOWED_FORMATS[1]
+
+
+def _is_stream_requested():
+    try:
+        return validate_string_bool(request.args.get('stream', 'false'))
+    except ValueError as err:
+        raise ValueError(HTTPStatus.BAD_REQUEST, str(err))
+
+
+def _create_streamed_response(data):
+    # The request context is kept until the last chunk has been sent, so the
+    # database connection is released by the teardown after the stream
+    chunks = SuccessObject.create_streamed_response(SuccessObject, data, True)
+    return Response(stream_with_context(chunks), mimetype='application/json')
+
+
+def _archived_until_header(model):
+    """A decorator that adds the X-Archived-Until header to the successful
+    responses of a listing, the archived rows are not part of the listing
+
+    Arguments:
+        model {Model} -- listed model
+    """
+    def add_header(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            response = fn(*args, **kwargs)
+            # Errors are returned as tuples
+            if not isinstance(response, Response):
+                return response
+            archived_until = _ArchiveService.get_archived_until(
+                _ArchiveService, model)
+            if archived_until:
+                response.headers[_ARCHIVED_UNTIL_HEADER] = \
+                    f'{archived_until:%Y-%m-%d}'
+            return response
+
+        return wrapper
+
+    return add_header
+
 
 @api.doc(security='JWT')
 @api.route('')
@@ -37,18 +127,50 @@ class DataResources(Resource):
                default='desc',
                enum=('desc', 'asc'),
                description='Sorts the result in ascending or descending order')
+    @api.param('cursor',
+               type=str,
+               description='Cursor of the next page, as returned in the '
+               'next_cursor field of the previous page')
+    @api.param('stream',
+               type=bool,
+               default=False,
+               description='Streams all data within the date range, limit is '
+               'optional and cursor is not used')
+    @api.param('format',
+               type=str,
+               default='rows',
+               enum=_ALLOWED_FORMATS,
+               description='Returns an object per row or, for columnar, a '
+               'list of values per field with dates as epoch seconds')
+    @api.header(_ARCHIVED_UNTIL_HEADER, _ARCHIVED_UNTIL_DESCRIPTION)
+    @_archived_until_header(DataSourceData)
     def get(self):
         """Fetches data from all sources"""
         try:
-            return jsonify(
-                SuccessObject.create_response(
-                    self, HTTPStatus.OK,
-                    _DataSourceDataService.get_all_data(
+            columnar = _is_columnar_requested()
+            if _is_stream_requested():
+                if columnar:
+                    raise ValueError(
+                        HTTPStatus.BAD_REQUEST,
+                        'The columnar format cannot be streamed')
+                return _create_streamed_response(
+                    _DataSourceDataService.stream_all_data(
                         self,
-                        limit=request.args.get('limit'),
                         start_date=request.args.get('start_date'),
                         end_date=request.args.get('end_date'),
-                        sort=request.args.get('sort')), True))
+                        sort=request.args.get('sort'),
+                        limit=request.args.get('limit')))
+            data, next_cursor = _DataSourceDataService.get_all_data(
+                self,
+                limit=request.args.get('limit'),
+                start_date=request.args.get('start_date'),
+                end_date=request.args.get('end_date'),
+                sort=request.args.get('sort'),
+                cursor=request.args.get('cursor'),
+                columnar=columnar)
+            return jsonify(
+                SuccessObject.create_response(self, HTTPStatus.OK, data,
+                                              not columnar, next_cursor))
         except Exception as err:
             return ErrorObject.create_response(self, err.args[0], err.args[1])
 
@@ -58,8 +180,17 @@ class DataResources(Resource):
     @check_for("Machine")
     def post(self, **kwargs):
         """Creates new data"""
-        token = get_jwt_identity()
+        token = get_current_identity()
         try:
+            if INGESTION_MODE == 'write_behind':
+                response = jsonify(
+                    SuccessObject.create_response(
+                        self, HTTPStatus.ACCEPTED,
+                        _DataSourceDataService.queue_data(
+                            self, token['data_source_token']['data_source'],
+                            kwargs['tupled_output'])))
+                response.status_code = HTTPStatus.ACCEPTED
+                return response
             return jsonify(
                 SuccessObject.create_response(
                     self, HTTPStatus.OK,
@@ -70,6 +201,83 @@ class DataResources(Resource):
             return ErrorObject.create_response(self, err.args[0], err.args[1])
 
 
+@api.doc(security='JWT')
+@api.route('/batch')
+class DataBatchResources(Resource):
+    @jwt_required_extended
+    @api.expect(create_data_source_data_batch_dto)
+    @convert_input_to_tuple
+    @check_for("Machine")
+    def post(self, **kwargs):
+        """Creates multiple data points in a single transaction"""
+        token = get_current_identity()
+        try:
+            return jsonify(
+                SuccessObject.create_response(
+                    self, HTTPStatus.OK,
+                    _DataSourceDataService.post_batch_data(
+                        self, token['data_source_token']['data_source'],
+                        getattr(kwargs['tupled_output'], 'data', None))))
+        except Exception as err:
+            return ErrorObject.create_response(self, err.args[0], err.args[1])
+
+
+@api.doc(security='JWT')
+@api.route('/stream')
+class DataStreamResources(Resource):
+    @jwt_required_extended
+    @check_for("Machine")
+    def post(self):
+        """Creates data points from a newline delimited JSON stream
+
+        Every line of the application/x-ndjson body contains one reading in
+        the format of a batch reading. The readings are committed in chunks.
+        """
+        if request.mimetype != 'application/x-ndjson':
+            return ErrorObject.create_response(
+                self, HTTPStatus.UNSUPPORTED_MEDIA_TYPE,
+                'Content type must be application/x-ndjson')
+        token = get_current_identity()
+        try:
+            return jsonify(
+                SuccessObject.create_response(
+                    self, HTTPStatus.OK,
+                    _DataSourceDataService.post_stream_data(
+                        self, token['data_source_token']['data_source'],
+                        request.stream)))
+        except Exception as err:
+            return ErrorObject.create_response(self, err.args[0], err.args[1])
+
+
+@api.doc(security='JWT')
+@api.route('/binary')
+class DataBinaryResources(Resource):
+    @jwt_required_extended
+    @check_for("Machine")
+    def post(self):
+        """Creates data points from a compact binary payload
+
+        The application/octet-stream body contains one or more readings of
+        6 bytes each: the time of measurement as big endian uint32 seconds
+        since the epoch (0 means the time of arrival) followed by the number
+        of clients as big endian uint16.
+        """
+        if request.mimetype != BINARY_READING_MIMETYPE:
+            return ErrorObject.create_response(
+                self, HTTPStatus.UNSUPPORTED_MEDIA_TYPE,
+                f'Content type must be {BINARY_READING_MIMETYPE}')
+        token = get_current_identity()
+        try:
+            return jsonify(
+                SuccessObject.create_response(
+                    self, HTTPStatus.OK,
+                    _DataSourceDataService.post_batch_data(
+                        self, token['data_source_token']['data_source'],
+                        unpack_binary_readings(request.get_data()))))
+        except Exception as err:
+            return ErrorObject.create_response(self, err.args[0], err.args[1])
+
+
 @api.doc(security='JWT')
 @api.route('/source/<data_source_id>')
 @api.param('data_source_id', 'The identifier of the data source')
@@ -91,19 +299,94 @@ class SpecificDataSourceResource(Resource):
                default='desc',
                enum=('desc', 'asc'),
                description='Sorts the result in ascendig or descending order')
+    @api.param('cursor',
+               type=str,
+               description='Cursor of the next page, as returned in the '
+               'next_cursor field of the previous page')
+    @api.param('stream',
+               type=bool,
+               default=False,
+               description='Streams all data within the date range, limit is '
+               'optional and cursor is not used')
+    @api.param('format',
+               type=str,
+               default='rows',
+               enum=_ALLOWED_FORMATS,
+               description='Returns an object per row or, for columnar, a '
+               'list of values per field with dates as epoch seconds')
+    @api.header(_ARCHIVED_UNTIL_HEADER, _ARCHIVED_UNTIL_DESCRIPTION)
+    @_archived_until_header(DataSourceData)
     def get(self, data_source_id):
         """Fetches all data from a single data source"""
         try:
-            return jsonify(
-                SuccessObject.create_response(
-                    self, HTTPStatus.OK,
-                    _DataSourceDataService.get_all_data_from_data_source(
+            columnar = _is_columnar_requested()
+            if _is_stream_requested():
+                if columnar:
+                    raise ValueError(
+                        HTTPStatus.BAD_REQUEST,
+                        'The columnar format cannot be streamed')
+                return _create_streamed_response(
+                    _DataSourceDataService.stream_all_data(
                         self,
-                        data_source_id=data_source_id,
-                        limit=request.args.get('limit'),
                         start_date=request.args.get('start_date'),
                         end_date=request.args.get('end_date'),
-                        sort=request.args.get('sort')), True))
+                        sort=request.args.get('sort'),
+                        limit=request.args.get('limit'),
+                        data_source_id=data_source_id))
+            data, next_cursor = \
+                _DataSourceDataService.get_all_data_from_data_source(
+                    self,
+                    data_source_id=data_source_id,
+                    limit=request.args.get('limit'),
+                    start_date=request.args.get('start_date'),
+                    end_date=request.args.get('end_date'),
+                    sort=request.args.get('sort'),
+                    cursor=request.args.get('cursor'),
+                    columnar=columnar)
+            return jsonify(
+                SuccessObject.create_response(self, HTTPStatus.OK, data,
+                                              not columnar, next_cursor))
+        except Exception as err:
+            return ErrorObject.create_response(self, err.args[0], err.args[1])
+
+
+@api.doc(security='JWT')
+@api.route('/source/<data_source_id>/aggregate')
+@api.param('data_source_id', 'The identifier of the data source')
+class DataSourceAggregateResource(Resource):
+    @jwt_required_extended
+    @api.param('bucket',
+               type=str,
+               default='1h',
+               enum=('10m', '1h', '1d'),
+               description='Size of the buckets')
+    @api.param('agg',
+               type=str,
+               default='mean',
+               description='Comma separated aggregates of the number of '
+               'clients, of mean, min, max and count, e.g: "mean,max"')
+    @api.param('start_date',
+               type=str,
+               description='Start date in YYYY-mm-dd format, e.g: "2019-12-31"'
+               )
+    @api.param('end_date',
+               type=str,
+               description='Inclusive end date in YYYY-mm-dd format, e.g: '
+               '"2019-12-31"')
+    def get(self, data_source_id):
+        """Fetches the aggregated data of a single data source per bucket, as
+        a list of values per column with buckets as epoch seconds"""
+        try:
+            data = _DataSourceDataRollupService.\
+                get_aggregated_data_from_data_source(
+                    self,
+                    data_source_id=data_source_id,
+                    bucket=request.args.get('bucket'),
+                    aggregates=request.args.get('agg'),
+                    start_date=request.args.get('start_date'),
+                    end_date=request.args.get('end_date'))
+            return jsonify(
+                SuccessObject.create_response(self, HTTPStatus.OK, data))
         except Exception as err:
             return ErrorObject.create_response(self, err.args[0], err.args[1])
 
@@ -129,6 +412,7 @@ class SincleDataResources(Resource):
 @api.route('/weather')
 class WeatherResources(Resource):
     @jwt_required_extended
+    @conditional_get(WEATHER_VERSION_NAME)
     @api.param('limit',
                type=int,
                default=20,
@@ -155,20 +439,40 @@ class WeatherResources(Resource):
                default='all',
                enum=('hourly', 'weekly', 'all'),
                description='Filters result by type.')
+    @api.param('cursor',
+               type=str,
+               description='Cursor of the next page, as returned in the '
+               'next_cursor field of the previous page')
+    @api.param('format',
+               type=str,
+               default='rows',
+               enum=_ALLOWED_FORMATS,
+               description='Returns an object per row or, for columnar, a '
+               'list of values per field with dates as epoch seconds')
+    @api.param('fields',
+               type=str,
+               description='Comma separated dotted paths of the fields of '
+               'the raw data to return instead of the raw data, e.g: '
+               '"main.temp,wind.speed"')
+    @api.header(_ARCHIVED_UNTIL_HEADER, _ARCHIVED_UNTIL_DESCRIPTION)
+    @_archived_until_header(Weather)
     def get(self):
         """Fetches all weather data"""
         try:
+            columnar = _is_columnar_requested()
+            data, next_cursor = _WeatherService.retrieve_all_weather_data(
+                self,
+                limit=request.args.get('limit'),
+                start_date=request.args.get('start_date'),
+                end_date=request.args.get('end_date'),
+                order_by=request.args.get('order_by'),
+                sort=request.args.get('sort'),
+                forecast_type=request.args.get('forecast_type'),
+                cursor=request.args.get('cursor'),
+                columnar=columnar,
+                fields=request.args.get('fields'))
             return jsonify(
-                SuccessObject.create_response(
-                    self, HTTPStatus.OK,
-                    _WeatherService.retrieve_all_weather_data(
-                        self,
-                        limit=request.args.get('limit'),
-                        start_date=request.args.get('start_date'),
-                        end_date=request.args.get('end_date'),
-                        order_by=request.args.get('order_by'),
-                        sort=request.args.get('sort'),
-                        forecast_type=request.args.get('forecast_type')),
-                    True))
+                SuccessObject.create_response(self, HTTPStatus.OK, data,
+                                              not columnar, next_cursor))
         except Exception as err:
             return ErrorObject.create_response(self, err.args[0], err.args[1])
@@ -1,10 +1,12 @@
 from http import HTTPStatus
 
-from flask import jsonify, request
+from flask import current_app, g, request
 from flask_restplus import Namespace, Resource
 
-from api.helpers import ErrorObject, SuccessObject, jwt_required_extended
+from api.helpers import (ErrorObject, SuccessObject, conditional_get,
+                         jsonify, jwt_required_extended)
 from api.services import ForecastService as _ForecastService
+from api.services.data_version import CROWD_FORECAST_VERSION_NAME
 
 from api.settings import FLASK_ENV
 
@@ -62,6 +64,7 @@ class ForecastResources(Resource):
                 HTTPStatus.NOT_FOUND.phrase)
 
     @jwt_required_extended
+    @conditional_get(CROWD_FORECAST_VERSION_NAME)
     @api.param('start_date',
                type=str,
                description='Start date in YYYY-mm-dd format, e.g: "2019-12-31"'
@@ -77,13 +80,14 @@ class ForecastResources(Resource):
     def get(self, **kwargs):
         """Retrieves crowd forecast per week"""
         try:
-            return jsonify(
-                SuccessObject.create_response(
-                    self, HTTPStatus.OK,
-                    _ForecastService.get_crowd_forecast(
-                        self,
-                        start_date=request.args.get('start_date'),
-                        end_date=request.args.get('end_date'),
-                        return_data_frame=request.args.get('get_dataframe'))))
+            return current_app.response_class(
+                _ForecastService.get_crowd_forecast_response(
+                    self,
+                    start_date=request.args.get('start_date'),
+                    end_date=request.args.get('end_date'),
+                    return_data_frame=request.args.get('get_dataframe'),
+                    # A cached response must not be older than its ETag
+                    min_version=g.data_versions[CROWD_FORECAST_VERSION_NAME]),
+                mimetype='application/json')
         except Exception as err:
             return ErrorObject.create_response(self, err.args[0], err.args[1])
@@ -0,0 +1,29 @@
+from http import HTTPStatus
+
+from flask_restplus import Namespace, Resource
+
+from api.helpers import (ErrorObject, SuccessObject, check_for,
+                         get_current_identity, jsonify,
+                         jwt_required_extended)
+from api.models import database as _database
+
+api = Namespace('monitoring', description="Monitoring related operations")
+
+
+@api.doc(security='JWT')
+@api.route('/database-pool')
+class DatabasePoolResource(Resource):
+    @jwt_required_extended
+    @check_for("User")
+    def get(self):
+        """Retrieves the statistics of the database connection pool of the
+        process that handles the request"""
+        token = get_current_identity()
+        if token['user']['id'] == 1:
+            return jsonify(
+                SuccessObject.create_response(self, HTTPStatus.OK,
+                                              _database.get_pool_stats()))
+        else:
+            return ErrorObject.create_response(
+                self, HTTPStatus.FORBIDDEN,
+                "You are unable to access this endpoint.")
@@ -1,10 +1,9 @@
 from http import HTTPStatus
 
-from flask import jsonify
 from flask_restplus import Namespace, Resource, fields
-from flask_jwt_extended import get_jwt_identity
 
 from api.helpers import (ErrorObject, SuccessObject, check_for,
+                         get_current_identity, jsonify,
                          jwt_required_extended)
 from api.services import (UserService as _UserService, DataSourceTokenService
                           as _DataSourceTokenService)
@@ -24,7 +23,7 @@ class UserResource(Resource):
     @check_for("User")
     def get(self):
         """Retrieves the information of the logged in user"""
-        token = get_jwt_identity()
+        token = get_current_identity()
         try:
             return jsonify(
                 SuccessObject.create_response(
@@ -38,7 +37,7 @@ class UserResource(Resource):
     @check_for("User")
     def post(self):
         """Sets the username of the logged in user"""
-        token = get_jwt_identity()
+        token = get_current_identity()
         try:
             return jsonify(
                 SuccessObject.create_response(
@@ -56,7 +55,7 @@ class UserDataSourceTokensResource(Resource):
     @check_for("User")
     def get(self):
         """Retrieves data source tokens created by the logged in user"""
-        token = get_jwt_identity()
+        token = get_current_identity()
         try:
             return jsonify(
                 SuccessObject.create_response(
@@ -69,13 +68,13 @@ class UserDataSourceTokensResource(Resource):
 
 @jwt_required_extended
 @api.doc(security='JWT')
-@api.route('/tokens/<token_id>/admin-revoke')
+@api.route('/tokens/<int:token_id>/admin-revoke')
 @api.param('token_id', 'Id of token to revoke')
 class UserDataSourceTokenAdminRevokeResource(Resource):
     @check_for("User")
     def post(self, token_id: int):
         """Deactivates a specific data source token"""
-        token = get_jwt_identity()
+        token = get_current_identity()
         if token['user']['id'] == 1:
             try:
                 return jsonify(
@@ -94,13 +93,13 @@ class UserDataSourceTokenAdminRevokeResource(Resource):
 
 @jwt_required_extended
 @api.doc(security='JWT')
-@api.route('/tokens/<token_id>/revoke')
+@api.route('/tokens/<int:token_id>/revoke')
 @api.param('token_id', 'Id of token to revoke')
 class UserDataSourceTokenRevokeResource(Resource):
     @check_for("User")
     def post(self, token_id: int):
         """Deactivates a specific data source token"""
-        token = get_jwt_identity()
+        token = get_current_identity()
         try:
             return jsonify(
                 SuccessObject.create_response(
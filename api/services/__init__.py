@@ -1,6 +1,9 @@
+from .archive import ArchiveService
 from .data_source import DataSourceService
 from .data_source_data import DataSourceDataService
+from .data_source_data_rollup import DataSourceDataRollupService
 from .data_source_token import DataSourceTokenService
+from .data_version import DataVersionService
 from .user import UserService
 from .weather import WeatherService
 from .forecast import ForecastService
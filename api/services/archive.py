@@ -0,0 +1,224 @@
+import os
+from datetime import datetime, timedelta
+from http import HTTPStatus
+
+from pandas import DataFrame, concat, read_parquet
+from pandas.api.types import is_numeric_dtype
+from peewee import chunked, fn
+
+from api.models import DataSourceData, Weather, database, use_replica
+from api.settings import ARCHIVE_DELETE_CHUNK_SIZE, ARCHIVE_DIRECTORY
+
+from .data_version import DataVersionService as _DataVersionService
+from .data_version import WEATHER_VERSION_NAME
+
+_ARCHIVED_MODELS = (DataSourceData, Weather)
+_PARTITION_PREFIX = 'date='
+
+
+def _to_datetime(date_to_convert):
+    if date_to_convert is None or isinstance(date_to_convert, datetime):
+        return date_to_convert
+    for date_format in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(date_to_convert, date_format)
+        except ValueError:
+            pass
+    raise ValueError(HTTPStatus.BAD_REQUEST,
+                     f'Invalid date {date_to_convert}, expected format is '
+                     f'YYYY-MM-DD or YYYY-MM-DD HH:MM:SS')
+
+
+def _get_table_directory(model):
+    return os.path.join(ARCHIVE_DIRECTORY, model._meta.table_name)
+
+
+def _get_archived_files(model, start: datetime = None, end: datetime = None):
+    """Lists the Parquet files of the archived days within a time range
+
+    Arguments:
+        model {Model} -- archived model
+
+    Keyword Arguments:
+        start {datetime} -- start of the range (default: {None})
+        end {datetime} -- end of the range (default: {None})
+
+    Returns:
+        list -- paths of the Parquet files, oldest day first
+    """
+    table_directory = _get_table_directory(model)
+    if not os.path.isdir(table_directory):
+        return []
+
+    archived_files = []
+    for partition in sorted(os.listdir(table_directory)):
+        if not partition.startswith(_PARTITION_PREFIX):
+            continue
+        day = datetime.strptime(partition[len(_PARTITION_PREFIX):],
+                                '%Y-%m-%d')
+        # Days outside of the range are not read
+        if (start and day + timedelta(days=1) <= start) or \
+                (end and day > end):
+            continue
+        partition_directory = os.path.join(table_directory, partition)
+        archived_files.extend(
+            os.path.join(partition_directory, file_name)
+            for file_name in sorted(os.listdir(partition_directory))
+            if file_name.endswith('.parquet'))
+    return archived_files
+
+
+def _write_archive_file(model, day: datetime, rows: list):
+    partition_directory = os.path.join(
+        _get_table_directory(model), f'{_PARTITION_PREFIX}{day:%Y-%m-%d}')
+    os.makedirs(partition_directory, exist_ok=True)
+    # The file is named after the ids it contains, so archiving the same rows
+    # again after an interrupted run overwrites the file
+    path = os.path.join(partition_directory,
+                        f'part-{rows[0]["id"]}-{rows[-1]["id"]}.parquet')
+    DataFrame(rows).to_parquet(path + '.tmp', engine='pyarrow', index=False)
+    os.replace(path + '.tmp', path)
+    return path
+
+
+class ArchiveService():
+    def archive_old_data(self, older_than_days: int):
+        """Moves the data source data and weather rows of the days before the
+        given number of days to Parquet files. The rows are written per day
+        and then deleted from the database in chunks.
+
+        Arguments:
+            older_than_days {int} -- number of days to keep in the database
+
+        Returns:
+            dict -- number of archived rows and written files per table
+        """
+        today = datetime.utcnow().replace(hour=0,
+                                          minute=0,
+                                          second=0,
+                                          microsecond=0)
+        cutoff = today - timedelta(days=older_than_days)
+        result = {}
+        for model in _ARCHIVED_MODELS:
+            table_result = result[model._meta.table_name] = {
+                'rows': 0,
+                'files': 0
+            }
+            while True:
+                oldest_date = model.select(fn.MIN(model.created_date)).where(
+                    model.created_date < cutoff).scalar()
+                if oldest_date is None:
+                    break
+                day = _to_datetime(oldest_date).replace(hour=0,
+                                                        minute=0,
+                                                        second=0,
+                                                        microsecond=0)
+                rows = list(
+                    model.select().where(
+                        model.created_date >= day,
+                        model.created_date < day + timedelta(days=1)).order_by(
+                            model.id.asc()).dicts())
+                _write_archive_file(model, day, rows)
+                # Small deletes keep the locks on the live table short
+                for chunk in chunked([row['id'] for row in rows],
+                                     ARCHIVE_DELETE_CHUNK_SIZE):
+                    with database.atomic():
+                        model.delete().where(model.id.in_(chunk)).execute()
+                table_result['rows'] += len(rows)
+                table_result['files'] += 1
+        # Archived weather rows are no longer returned by the weather listing
+        if result[Weather._meta.table_name]['rows']:
+            _DataVersionService.bump_version(_DataVersionService,
+                                             WEATHER_VERSION_NAME)
+        return result
+
+    def get_archived_until(self, model):
+        """Retrieves the date before which the rows of a model have been
+        archived. Those rows are only returned by get_data_frame.
+
+        Arguments:
+            model {Model} -- DataSourceData or Weather
+
+        Returns:
+            datetime -- start of the day after the newest archived day, None
+            if no rows have been archived
+        """
+        table_directory = _get_table_directory(model)
+        if not os.path.isdir(table_directory):
+            return None
+        archived_days = [
+            partition[len(_PARTITION_PREFIX):]
+            for partition in os.listdir(table_directory)
+            if partition.startswith(_PARTITION_PREFIX)
+        ]
+        if not archived_days:
+            return None
+        return datetime.strptime(max(archived_days),
+                                 '%Y-%m-%d') + timedelta(days=1)
+
+    @use_replica
+    def get_data_frame(self,
+                       model,
+                       start_date=None,
+                       end_date=None,
+                       filters: dict = None,
+                       columns: list = None):
+        """Retrieves the rows of a time range from the archive and the
+        database. Only the archived days within the time range are read.
+
+        Arguments:
+            model {Model} -- DataSourceData or Weather
+
+        Keyword Arguments:
+            start_date {str} -- rows created on or after this date
+            (default: {None})
+            end_date {str} -- rows created on or before this date
+            (default: {None})
+            filters {dict} -- column values the rows must be equal to, e.g.
+            {'data_source': 2} (default: {None})
+            columns {list} -- columns to return, id, created_date and the
+            filtered columns are always returned (default: {None})
+
+        Returns:
+            DataFrame -- rows ordered by created_date
+        """
+        start, end = _to_datetime(start_date), _to_datetime(end_date)
+        filters = filters or {}
+        if columns:
+            columns = list(
+                dict.fromkeys(['id', 'created_date'] + list(columns) +
+                              list(filters)))
+
+        query = model.select(
+            *[getattr(model, column)
+              for column in columns]) if columns else model.select()
+        if start:
+            query = query.where(model.created_date >= start)
+        if end:
+            query = query.where(model.created_date <= end)
+        for column, value in filters.items():
+            query = query.where(getattr(model, column) == value)
+
+        data_frames = []
+        for archived_file in _get_archived_files(model, start, end):
+            data_frame = read_parquet(archived_file,
+                                      engine='pyarrow',
+                                      columns=columns)
+            for column, value in filters.items():
+                if not is_numeric_dtype(data_frame[column]):
+                    value = str(value)
+                data_frame = data_frame[data_frame[column] == value]
+            if start:
+                data_frame = data_frame[data_frame['created_date'] >= start]
+            if end:
+                data_frame = data_frame[data_frame['created_date'] <= end]
+            data_frames.append(data_frame)
+        data_frames.append(DataFrame(list(query.dicts()), columns=columns))
+
+        data_frame = concat(data_frames, ignore_index=True, sort=False)
+        if data_frame.empty:
+            return data_frame
+        # Rows that were archived but not yet deleted by an interrupted run
+        # are returned once
+        return data_frame.drop_duplicates(subset='id').sort_values(
+            'created_date').reset_index(drop=True)
@@ -4,10 +4,17 @@ from peewee import DoesNotExist, IntegrityError
 from playhouse.shortcuts import model_to_dict
 
 from api.dto import CreateDataSourceDto
+from api.helpers import TimedLRUCache
 from api.models import DataSource, User
+from api.settings import DATA_SOURCE_CACHE_TTL
 
 from .user import UserService as _UserService
 
+# The ids of existing data sources are cached per process for the ingestion
+# path. Removed data sources are noticed after DATA_SOURCE_CACHE_TTL seconds
+# in other processes.
+_data_source_cache = TimedLRUCache(max_size=1024, ttl=DATA_SOURCE_CACHE_TTL)
+
 
 def _get_user(create_data_source_dto: CreateDataSourceDto, user_id: int,
               username: str):
@@ -61,6 +68,41 @@ class DataSourceService():
                 HTTPStatus.NOT_FOUND,
                 'Data source with id {} does not exist'.format(id))
 
+    def check_data_source_exists(self, id: int):
+        """Checks if a data source exists, existing ids are cached
+
+        Arguments:
+            id {int} -- Id of data source
+
+        Raises:
+            ValueError: Data source not found with given id
+
+        Returns:
+            int -- the id of the data source
+        """
+        data_source_id = _data_source_cache.get(str(id))
+        if data_source_id is None:
+            data_source_id = DataSource.select(DataSource.id).where(
+                DataSource.id == id).scalar()
+            if data_source_id is None:
+                raise ValueError(
+                    HTTPStatus.NOT_FOUND,
+                    'Data source with id {} does not exist'.format(id))
+            _data_source_cache.set(str(id), data_source_id)
+        return data_source_id
+
+    def invalidate_data_source_cache(self, id: int = None):
+        """Removes a data source from the cache of existing ids
+
+        Keyword Arguments:
+            id {int} -- Id of data source, clears the whole cache if no id
+            is given (default: {None})
+        """
+        if id is None:
+            _data_source_cache.clear()
+        else:
+            _data_source_cache.invalidate(str(id))
+
     def add_data_source(self,
                         create_data_source_dto: CreateDataSourceDto,
                         user_id=None,
@@ -84,11 +126,13 @@ class DataSourceService():
 
         if result is not None and isinstance(result, User):
             try:
-                return model_to_dict(
-                    DataSource.create(
-                        description=create_data_source_dto.description,
-                        source=create_data_source_dto.source,
-                        user=result))
+                data_source = DataSource.create(
+                    description=create_data_source_dto.description,
+                    source=create_data_source_dto.source,
+                    user=result)
+                DataSourceService.invalidate_data_source_cache(
+                    self, data_source.id)
+                return model_to_dict(data_source)
 
             except IntegrityError:
                 raise IntegrityError(
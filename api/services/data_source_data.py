@@ -1,18 +1,412 @@
+import json
 from http import HTTPStatus
+from types import SimpleNamespace
 
-from peewee import DoesNotExist, IntegrityError
-from playhouse.shortcuts import dict_to_model, model_to_dict
+from peewee import DataError, DoesNotExist, IntegrityError, chunked
+from playhouse.shortcuts import model_to_dict
 
 from api.dto import CreateDataSourceDataDto
-from api.helpers import to_utc_datetime, validate_dateformat
-from api.models import DataSource, DataSourceData
+from api.helpers import (IngestionBuffer, RecentKeySet,
+                         add_extra_info_to_dict, apply_cursor, apply_keyset,
+                         encode_cursor, to_columns, to_utc_datetime,
+                         validate_dateformat, validate_datetimeformat)
+from api.models import (DataSourceData, bind_to_read_database, database,
+                        replica_reads, use_replica)
+from api.settings import (IDEMPOTENCY_KEY_CACHE_SIZE, INGESTION_FLUSH_INTERVAL,
+                          INGESTION_FLUSH_SIZE, INGESTION_WAL_DIRECTORY,
+                          INGESTION_WAL_FSYNC, PARTITIONING_ENABLED)
 
 from .data_source import DataSourceService as _DataSourceService
+from .data_source_data_rollup import \
+    DataSourceDataRollupService as _DataSourceDataRollupService
 
 _ALLOWED_SORT_VALUES = ['asc', 'desc']
+_MAX_BATCH_SIZE = 10000
+_INSERT_CHUNK_SIZE = 1000
+_INSERT_ATTEMPTS = 3
+_MAX_IDEMPOTENCY_KEY_LENGTH = 64
+# Largest value of the signed INT column no_of_clients
+_MAX_NO_OF_CLIENTS = 2**31 - 1
+_STREAM_CHUNK_SIZE = 1000
+_MAX_STREAM_ERRORS = 1000
+_STREAM_FETCH_SIZE = 1000
+# Columns of the columnar format, the id is the first column
+_COLUMNAR_FIELDS = (DataSourceData.id, DataSourceData.data_source,
+                    DataSourceData.no_of_clients, DataSourceData.created_date)
+_COLUMNAR_CREATED_DATE_INDEX = 3
+
+# Idempotency keys that have recently been stored, so retried readings can be
+# recognized without querying the database
+_recent_idempotency_keys = RecentKeySet(max_size=IDEMPOTENCY_KEY_CACHE_SIZE)
+
+
+def _reading_to_row(data_source_id: int, reading):
+    """Validates a single reading and converts it to a DataSourceData row
+
+    Arguments:
+        data_source_id {int} -- id of data source
+        reading {object} -- reading containing the field no_of_clients and
+        optionally the fields created_date and idempotency_key
+
+    Raises:
+        ValueError: Reading is invalid
+
+    Returns:
+        dict -- row that can be passed to insert_many
+    """
+    no_of_clients = getattr(reading, 'no_of_clients', None)
+    if isinstance(no_of_clients, bool) or not isinstance(no_of_clients, int):
+        raise ValueError('Field no_of_clients is required and must be of '
+                         'type <int>')
+    if no_of_clients < 0:
+        raise ValueError('Field no_of_clients cannot be negative')
+    if no_of_clients > _MAX_NO_OF_CLIENTS:
+        raise ValueError(f'Field no_of_clients cannot exceed '
+                         f'{_MAX_NO_OF_CLIENTS}')
+
+    created_date = getattr(reading, 'created_date', None)
+    if created_date:
+        validate_datetimeformat('created_date', created_date)
+    else:
+        created_date = to_utc_datetime()
+
+    idempotency_key = getattr(reading, 'idempotency_key', None)
+    if idempotency_key is not None:
+        if isinstance(idempotency_key, bool) or not isinstance(
+                idempotency_key, (str, int)):
+            raise ValueError('Field idempotency_key must be of type <str>')
+        idempotency_key = str(idempotency_key)
+        if not idempotency_key or \
+                len(idempotency_key) > _MAX_IDEMPOTENCY_KEY_LENGTH:
+            raise ValueError(f'Field idempotency_key must contain 1 to '
+                             f'{_MAX_IDEMPOTENCY_KEY_LENGTH} characters')
+
+    return {
+        'data_source': data_source_id,
+        'no_of_clients': no_of_clients,
+        'created_date': created_date,
+        'idempotency_key': idempotency_key
+    }
+
+
+def _get_dedup_key(row: dict):
+    """Returns the key of a row in the recent idempotency key set, or None if
+    the row has no idempotency key"""
+    if row['idempotency_key'] is None:
+        return None
+    return f"{row['data_source']}:{row['idempotency_key']}"
+
+
+def _duplicate_reading(row: dict):
+    return add_extra_info_to_dict(
+        dict(row), 'message',
+        f"Reading with idempotency key {row['idempotency_key']} has already "
+        f"been stored.")
+
+
+def _find_stored_idempotency_keys(data_source_id: int, keys: list):
+    """Retrieves which of the given idempotency keys have been stored
+
+    Arguments:
+        data_source_id {int} -- id of data source
+        keys {list} -- idempotency keys to look up
+
+    Returns:
+        set -- idempotency keys that have been stored
+    """
+    stored_keys = set()
+    for chunk in chunked(keys, _INSERT_CHUNK_SIZE):
+        query = DataSourceData.select(DataSourceData.idempotency_key).where(
+            DataSourceData.data_source_id == data_source_id,
+            DataSourceData.idempotency_key.in_(chunk))
+        stored_keys.update(key for key, in query.tuples())
+    return stored_keys
+
+
+def _remove_stored_rows(rows: list, look_up_stored_keys: bool = True):
+    """Removes the rows with an idempotency key that has already been stored
+    or that occurs earlier in the rows
+
+    Arguments:
+        rows {list} -- rows as returned by _reading_to_row
+
+    Keyword Arguments:
+        look_up_stored_keys {bool} -- queries the database for the stored
+        idempotency keys, otherwise only the keys that occur earlier in the
+        rows are removed (default: {True})
+
+    Returns:
+        list -- rows that have not been stored
+    """
+    keys_per_data_source = {}
+    for row in rows:
+        if look_up_stored_keys and row['idempotency_key'] is not None:
+            keys_per_data_source.setdefault(row['data_source'],
+                                            set()).add(row['idempotency_key'])
+    stored_keys = set()
+    for data_source_id, keys in keys_per_data_source.items():
+        stored_keys.update(
+            f'{data_source_id}:{key}'
+            for key in _find_stored_idempotency_keys(data_source_id,
+                                                     sorted(keys)))
+
+    new_rows = []
+    for row in rows:
+        dedup_key = _get_dedup_key(row)
+        if dedup_key:
+            if dedup_key in stored_keys:
+                continue
+            stored_keys.add(dedup_key)
+        new_rows.append(row)
+    return new_rows
+
+
+def _insert_rows(rows: list):
+    """Inserts the DataSourceData rows that have not been stored in chunks
+    and adds them to the rollups inside a single transaction. Only the rows
+    that are inserted are added to the rollups.
+
+    Arguments:
+        rows {list} -- rows as returned by _reading_to_row
+
+    Raises:
+        IntegrityError: Rows conflict with stored rows after all attempts
+
+    Returns:
+        list -- the rows that have been inserted
+    """
+    for attempt in range(_INSERT_ATTEMPTS):
+        # The unique index of an unpartitioned table rejects stored keys, so
+        # the stored keys are only looked up after a rejected insert. The
+        # unique index of a partitioned table also contains created_date and
+        # does not reject a retried reading that got a new server timestamp.
+        new_rows = _remove_stored_rows(
+            rows, look_up_stored_keys=PARTITIONING_ENABLED or attempt > 0)
+        if not new_rows:
+            return new_rows
+        try:
+            with database.atomic():
+                for chunk in chunked(new_rows, _INSERT_CHUNK_SIZE):
+                    DataSourceData.insert_many(chunk).execute()
+                _DataSourceDataRollupService.add_rows_to_rollups(
+                    _DataSourceDataRollupService, new_rows)
+            break
+        except IntegrityError:
+            # One of the idempotency keys has already been stored, the
+            # transaction is retried without the stored rows
+            if attempt == _INSERT_ATTEMPTS - 1:
+                raise
+    for row in new_rows:
+        dedup_key = _get_dedup_key(row)
+        if dedup_key:
+            _recent_idempotency_keys.add(dedup_key)
+    return new_rows
+
+
+def _store_readings(data_source_id: int, indexed_readings):
+    """Validates readings and stores the valid readings in a single
+    transaction
+
+    Arguments:
+        data_source_id {int} -- id of data source
+        indexed_readings {iterable} -- tuples of the index (or line number)
+        and the reading
+
+    Raises:
+        ValueError: Unable to store the readings
+
+    Returns:
+        list -- status of every reading
+    """
+    # Readings are matched with their status, readings with an
+    # idempotency key that has already been stored are marked as duplicate
+    pending = []
+    results = []
+    dedup_keys_in_batch = set()
+    for index, reading in indexed_readings:
+        try:
+            row = _reading_to_row(data_source_id, reading)
+        except ValueError as err:
+            results.append({
+                'index': index,
+                'status': 'rejected',
+                'message': str(err)
+            })
+            continue
+
+        result = {'index': index, 'status': 'created'}
+        results.append(result)
+        dedup_key = _get_dedup_key(row)
+        if dedup_key:
+            if dedup_key in dedup_keys_in_batch or \
+                    dedup_key in _recent_idempotency_keys:
+                result['status'] = 'duplicate'
+                continue
+            dedup_keys_in_batch.add(dedup_key)
+        pending.append((row, result))
+
+    try:
+        # Only keys that are not known to this process are looked up
+        inserted_rows = _insert_rows([row for row, _ in pending])
+    except DataError as err:
+        raise ValueError(HTTPStatus.BAD_REQUEST,
+                         f'Unable to store the readings: {err.args[-1]}')
+    except IntegrityError:
+        raise ValueError(HTTPStatus.INTERNAL_SERVER_ERROR,
+                         'Internal server error')
+    inserted_row_ids = {id(row) for row in inserted_rows}
+    for row, result in pending:
+        if id(row) not in inserted_row_ids:
+            result['status'] = 'duplicate'
+    return results
+
+
+def _flush_rows(rows: list):
+    """Writes the rows of the ingestion buffer outside of a request"""
+    with database.connection_context():
+        # Segments are replayed after a restart, rows of a segment that have
+        # already been stored are skipped
+        _insert_rows(rows)
+
+
+_ingestion_buffer = IngestionBuffer(_flush_rows,
+                                    INGESTION_WAL_DIRECTORY,
+                                    flush_size=INGESTION_FLUSH_SIZE,
+                                    flush_interval=INGESTION_FLUSH_INTERVAL,
+                                    fsync=INGESTION_WAL_FSYNC,
+                                    unwritable_errors=(DataError,
+                                                       IntegrityError))
+
+
+def _filter_by_date(query, start_date: str, end_date: str):
+    if start_date:
+        try:
+            validate_dateformat('start_date', start_date)
+            query = query.where(DataSourceData.created_date >= start_date)
+        except ValueError as err:
+            raise ValueError(HTTPStatus.BAD_REQUEST, str(err))
+    if end_date:
+        try:
+            validate_dateformat('end_date', end_date)
+            query = query.where(DataSourceData.created_date <= end_date)
+        except ValueError as err:
+            raise ValueError(HTTPStatus.BAD_REQUEST, str(err))
+    return query
+
+
+def _is_descending(sort: str):
+    if sort.lower() not in _ALLOWED_SORT_VALUES:
+        raise ValueError(
+            HTTPStatus.BAD_REQUEST,
+            'Invalid sort value, only "asc" or "desc" are allowed')
+    return sort.lower() == _ALLOWED_SORT_VALUES[1]
+
+
+def _to_limit(limit):
+    try:
+        casted_limit = int(limit)
+    except ValueError:
+        raise ValueError(
+            HTTPStatus.BAD_REQUEST,
+            'Invalid limit value, only values of type <int> are allowed')
+    if casted_limit < 1:
+        raise ValueError(HTTPStatus.BAD_REQUEST,
+                         'Invalid limit value, limit must be at least 1')
+    return casted_limit
+
+
+def _get_page(query, limit, sort: str, cursor: str, columnar: bool = False):
+    """Retrieves a page of data source data ordered by creation date
+
+    Arguments:
+        query {ModelSelect} -- filtered data source data query
+        limit {int} -- maximum number of rows of the page
+        sort {str} -- sorts the data in ascending or descending order
+        cursor {str} -- cursor of the page, None for the first page
+
+    Keyword Arguments:
+        columnar {bool} -- returns one list of values per column instead of
+        a dictionary per row (default: {False})
+
+    Raises:
+        ValueError: Invalid sort, limit or cursor value
+
+    Returns:
+        tuple -- An array of data source data, or a dictionary of columns in
+        columnar format, and the cursor of the next page, None on the last
+        page
+    """
+    descending = _is_descending(sort)
+    try:
+        query = apply_cursor(query, DataSourceData.created_date,
+                             DataSourceData.id, cursor, descending)
+    except ValueError as err:
+        raise ValueError(HTTPStatus.BAD_REQUEST, str(err))
+    casted_limit = _to_limit(limit)
+
+    # One extra row is fetched to find out if there is a next page
+    query = query.limit(casted_limit + 1)
+    if columnar:
+        all_data = list(query.select(*_COLUMNAR_FIELDS).tuples())
+    else:
+        all_data = [model_to_dict(data, recurse=False) for data in query]
+
+    next_cursor = None
+    if len(all_data) > casted_limit:
+        del all_data[casted_limit:]
+        if columnar:
+            next_cursor = encode_cursor(
+                all_data[-1][_COLUMNAR_CREATED_DATE_INDEX], all_data[-1][0])
+        else:
+            next_cursor = encode_cursor(all_data[-1]['created_date'],
+                                        all_data[-1]['id'])
+    if columnar:
+        all_data = to_columns([field.name for field in _COLUMNAR_FIELDS],
+                              all_data, ('created_date', ))
+    return all_data, next_cursor
+
+
+def _stream_rows(query, descending: bool, limit: int = None):
+    """Iterates over the rows of a query ordered by creation date. The rows
+    are fetched in chunks, every chunk continues after the last row of the
+    previous chunk, so only one chunk is held in memory at a time.
+
+    Arguments:
+        query {ModelSelect} -- filtered data source data query
+        descending {bool} -- True to return the newest rows first
+
+    Keyword Arguments:
+        limit {int} -- maximum number of rows, None for all rows
+        (default: {None})
+
+    Yields:
+        dict -- data source data
+    """
+    after = None
+    remaining = limit
+    while remaining is None or remaining > 0:
+        chunk_size = _STREAM_FETCH_SIZE if remaining is None else min(
+            remaining, _STREAM_FETCH_SIZE)
+        # The generator is consumed after the service method has returned,
+        # so every chunk is bound to a replica here. The query was bound to
+        # the primary when it was created outside replica_reads.
+        with replica_reads():
+            rows = list(
+                bind_to_read_database(
+                    apply_keyset(query, DataSourceData.created_date,
+                                 DataSourceData.id, after,
+                                 descending).limit(chunk_size)))
+        for row in rows:
+            yield model_to_dict(row, recurse=False)
+        if len(rows) < chunk_size:
+            return
+        after = (rows[-1].created_date, rows[-1].id)
+        if remaining is not None:
+            remaining -= len(rows)
 
 
 class DataSourceDataService():
+    @use_replica
     def get_one_data_point(self, data_id: int):
         """Retrieves a single data point
 
@@ -31,9 +425,15 @@ class DataSourceDataService():
             raise ValueError(HTTPStatus.NOT_FOUND,
                              'Data with id {} does not exist'.format(data_id))
 
-    def get_all_data(self, limit: int, start_date: str, end_date: str,
-                     sort: str):
-        """Retrieves all data
+    @use_replica
+    def get_all_data(self,
+                     limit: int,
+                     start_date: str,
+                     end_date: str,
+                     sort: str,
+                     cursor: str = None,
+                     columnar: bool = False):
+        """Retrieves all data ordered by creation date
 
         Arguments:
             limit {int} -- limits the number of results
@@ -41,10 +441,17 @@ class DataSourceDataService():
             end_date {str} -- end date
             sort {str} -- sorts the data in ascending or descending order
 
+        Keyword Arguments:
+            cursor {str} -- cursor of the page to retrieve, as returned for
+            the previous page (default: {None})
+            columnar {bool} -- returns one list of values per column, with
+            the dates as seconds since the epoch (default: {False})
+
         Returns:
-            DataSourceData -- An array of all data source data will be returned
+            tuple -- An array of data source data, or a dictionary of columns
+            in columnar format, and the cursor of the next page, None on the
+            last page
         """
-        all_data_array = []
         query = DataSourceData.select()
         # Set defaults
         if not limit:
@@ -52,49 +459,21 @@ class DataSourceDataService():
         if not sort:
             sort = 'desc'
 
-        if start_date:
-            try:
-                validate_dateformat('start_date', start_date)
-                query = query.where(DataSourceData.created_date >= start_date)
-            except ValueError as err:
-                raise ValueError(HTTPStatus.BAD_REQUEST,
-                                 str(err))
-        if end_date:
-            try:
-                validate_dateformat('end_date', end_date)
-                query = query.where(DataSourceData.created_date <= end_date)
-            except ValueError as err:
-                raise ValueError(HTTPStatus.BAD_REQUEST,
-                                 str(err))
-
-        # Build the query based on the query params
-        if sort.lower() in _ALLOWED_SORT_VALUES:
-            if sort.lower() == _ALLOWED_SORT_VALUES[0]:
-                query = query.order_by(DataSourceData.id.asc())
-            else:
-                query = query.order_by(DataSourceData.id.desc())
-        else:
-            raise ValueError(
-                HTTPStatus.BAD_REQUEST,
-                'Invalid sort value, only "asc" or "desc" are allowed')
-        try:
-            casted_limit = int(limit)
-        except ValueError:
-            raise ValueError(
-                HTTPStatus.BAD_REQUEST,
-                'Invalid limit value, only values of type <int> are allowed')
-
-        query = query.limit(casted_limit)
+        query = _filter_by_date(query, start_date, end_date)
 
-        for data in query:
-            all_data_array.append(model_to_dict(data, recurse=False))
+        return _get_page(query, limit, sort, cursor, columnar)
 
-        return all_data_array
-
-    def get_all_data_from_data_source(self, data_source_id: int, limit: int,
-                                      start_date: str, end_date: str,
-                                      sort: str = 'desc'):
-        """Retrieves all data from a specific data source
+    @use_replica
+    def get_all_data_from_data_source(self,
+                                      data_source_id: int,
+                                      limit: int,
+                                      start_date: str,
+                                      end_date: str,
+                                      sort: str = 'desc',
+                                      cursor: str = None,
+                                      columnar: bool = False):
+        """Retrieves all data from a specific data source ordered by creation
+        date
 
         Arguments:
             data_source_id {int} -- data source id
@@ -103,10 +482,17 @@ class DataSourceDataService():
             end_date {str} -- end date
             sort {str} -- sorts the data in ascending or descending order
 
+        Keyword Arguments:
+            cursor {str} -- cursor of the page to retrieve, as returned for
+            the previous page (default: {None})
+            columnar {bool} -- returns one list of values per column, with
+            the dates as seconds since the epoch (default: {False})
+
         Returns:
-            DataSourceData -- An array of all data source data will be returned
+            tuple -- An array of data source data, or a dictionary of columns
+            in columnar format, and the cursor of the next page, None on the
+            last page
         """
-        all_data_array = []
         query = DataSourceData.select().where(
             DataSourceData.data_source_id == data_source_id)
         # Set defaults
@@ -115,47 +501,48 @@ class DataSourceDataService():
         if not sort:
             sort = 'desc'
 
-        if start_date:
-            try:
-                validate_dateformat('start_date', start_date)
-                query = query.where(DataSourceData.created_date >= start_date)
-            except ValueError as err:
-                raise ValueError(HTTPStatus.BAD_REQUEST,
-                                 str(err))
-        if end_date:
-            try:
-                validate_dateformat('end_date', end_date)
-                query = query.where(DataSourceData.created_date <= end_date)
-            except ValueError as err:
-                raise ValueError(HTTPStatus.BAD_REQUEST,
-                                 str(err))
-        # Build the query based on the query params
-        if sort.lower() in _ALLOWED_SORT_VALUES:
-            if sort.lower() == _ALLOWED_SORT_VALUES[0]:
-                query = query.order_by(DataSourceData.id.asc())
-            else:
-                query = query.order_by(DataSourceData.id.desc())
-        else:
-            raise ValueError(
-                HTTPStatus.BAD_REQUEST,
-                'Invalid sort value, only "asc" or "desc" are allowed')
-        try:
-            casted_limit = int(limit)
-        except ValueError:
-            raise ValueError(
-                HTTPStatus.BAD_REQUEST,
-                'Invalid limit value, only values of type <int> are allowed')
+        query = _filter_by_date(query, start_date, end_date)
+        return _get_page(query, limit, sort, cursor, columnar)
 
-        query = query.limit(casted_limit)
+    def stream_all_data(self,
+                        start_date: str,
+                        end_date: str,
+                        sort: str,
+                        limit: int = None,
+                        data_source_id: int = None):
+        """Retrieves data ordered by creation date without loading the whole
+        result in memory. The parameters are validated immediately, the rows
+        are fetched in chunks while the result is consumed.
 
-        for data in query:
-            all_data_array.append(model_to_dict(data, recurse=False))
+        Arguments:
+            start_date {str} -- start date
+            end_date {str} -- end date
+            sort {str} -- sorts the data in ascending or descending order
 
-        return all_data_array
+        Keyword Arguments:
+            limit {int} -- limits the number of results, all data within the
+            date range is returned when not set (default: {None})
+            data_source_id {int} -- only returns the data of this data source
+            (default: {None})
+
+        Returns:
+            generator -- data source data
+        """
+        query = DataSourceData.select()
+        if data_source_id is not None:
+            query = query.where(
+                DataSourceData.data_source_id == data_source_id)
+        if not sort:
+            sort = 'desc'
+
+        query = _filter_by_date(query, start_date, end_date)
+        return _stream_rows(query, _is_descending(sort),
+                            _to_limit(limit) if limit else None)
 
     def post_data(self, data_source_id: int,
                   create_data_source_data_dto: CreateDataSourceDataDto):
-        """Creates a data point
+        """Creates a data point. A data point with an idempotency key that
+        has already been stored is not created again.
 
         Arguments:
             data_source_id {int} -- id of data source
@@ -169,23 +556,203 @@ class DataSourceDataService():
         Returns:
             DataSourceData -- DataSourceData object
         """
-        data_source = None
+        # Served from the cache of existing data sources, the foreign key is
+        # set by id
+        data_source_id = _DataSourceService.check_data_source_exists(
+            self, data_source_id)
+
+        if not create_data_source_data_dto:
+            raise ValueError(HTTPStatus.BAD_REQUEST, 'Body is required')
         try:
-            data_source = _DataSourceService.get_data_source_by_id(
-                self, data_source_id)
-        except Exception:
-            raise
+            row = _reading_to_row(data_source_id, create_data_source_data_dto)
+        except ValueError as err:
+            raise ValueError(HTTPStatus.BAD_REQUEST, str(err))
+
+        dedup_key = _get_dedup_key(row)
+        # Without partitioning a stored key is rejected by the unique index
+        if dedup_key and (dedup_key in _recent_idempotency_keys or
+                          PARTITIONING_ENABLED and
+                          not _remove_stored_rows([row])):
+            _recent_idempotency_keys.add(dedup_key)
+            return _duplicate_reading(row)
 
         try:
-            if create_data_source_data_dto:
-                return model_to_dict(
-                    DataSourceData.create(
-                        data_source=dict_to_model(DataSource, data_source),
-                        no_of_clients=create_data_source_data_dto.
-                        no_of_clients,
-                        created_date=to_utc_datetime()))
-            else:
-                raise ValueError(HTTPStatus.BAD_REQUEST, 'Body is required')
+            with database.atomic():
+                data_point = DataSourceData.create(
+                    data_source=data_source_id,
+                    no_of_clients=row['no_of_clients'],
+                    created_date=row['created_date'],
+                    idempotency_key=row['idempotency_key'])
+                _DataSourceDataRollupService.add_rows_to_rollups(
+                    _DataSourceDataRollupService, [row])
+        except DataError as err:
+            raise ValueError(HTTPStatus.BAD_REQUEST,
+                             f'Unable to store the reading: {err.args[-1]}')
         except IntegrityError:
+            if dedup_key:
+                _recent_idempotency_keys.add(dedup_key)
+                return _duplicate_reading(row)
             raise ValueError(HTTPStatus.INTERNAL_SERVER_ERROR,
                              'Internal server error')
+
+        if dedup_key:
+            _recent_idempotency_keys.add(dedup_key)
+        return model_to_dict(data_point, recurse=False)
+
+    def post_batch_data(self, data_source_id: int, readings: list):
+        """Creates multiple data points in a single transaction
+
+        Arguments:
+            data_source_id {int} -- id of data source
+            readings {list} -- list of readings, every reading contains the
+            field no_of_clients and optionally the field created_date
+            (YYYY-mm-dd HH:MM:SS in UTC) as measured by the device and the
+            field idempotency_key
+
+        Raises:
+            ValueError: Data source not found with given id
+            ValueError: No readings or too many readings provided
+
+        Returns:
+            dict -- Number of created, duplicate and rejected readings and
+            the status per reading
+        """
+        data_source_id = _DataSourceService.check_data_source_exists(
+            self, data_source_id)
+
+        if not readings:
+            raise ValueError(HTTPStatus.BAD_REQUEST,
+                             'At least one reading is required')
+        if len(readings) > _MAX_BATCH_SIZE:
+            raise ValueError(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                f'A batch can contain at most {_MAX_BATCH_SIZE} readings')
+
+        results = _store_readings(data_source_id, enumerate(readings))
+
+        statuses = [result['status'] for result in results]
+        return {
+            'created': statuses.count('created'),
+            'duplicate': statuses.count('duplicate'),
+            'rejected': statuses.count('rejected'),
+            'results': results
+        }
+
+    def post_stream_data(self, data_source_id: int, lines):
+        """Creates data points from a stream of newline delimited JSON. The
+        stream is read incrementally and the readings are committed in chunks
+        of a fixed size, so memory usage does not grow with the size of the
+        stream.
+
+        Arguments:
+            data_source_id {int} -- id of data source
+            lines {iterable} -- lines of the stream, every line contains a
+            JSON object with the same fields as a reading of a batch
+
+        Raises:
+            ValueError: Data source not found with given id
+
+        Returns:
+            dict -- Number of received, created, duplicate and rejected
+            readings, the number of committed chunks and the errors per line
+        """
+        data_source_id = _DataSourceService.check_data_source_exists(
+            self, data_source_id)
+
+        progress = {
+            'received': 0,
+            'created': 0,
+            'duplicate': 0,
+            'rejected': 0,
+            'committed_chunks': 0
+        }
+        errors = []
+
+        def add_results(results):
+            for result in results:
+                progress[result['status']] += 1
+                if result['status'] == 'rejected' and \
+                        len(errors) < _MAX_STREAM_ERRORS:
+                    errors.append({
+                        'line': result['index'],
+                        'message': result['message']
+                    })
+
+        chunk = []
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            progress['received'] += 1
+            try:
+                reading = json.loads(line)
+                message = None if isinstance(
+                    reading, dict) else 'Line must contain a JSON object'
+            except ValueError as err:
+                message = f'Invalid JSON: {err}'
+            if message:
+                add_results([{
+                    'index': line_number,
+                    'status': 'rejected',
+                    'message': message
+                }])
+                continue
+
+            chunk.append((line_number, SimpleNamespace(**reading)))
+            if len(chunk) >= _STREAM_CHUNK_SIZE:
+                add_results(_store_readings(data_source_id, chunk))
+                progress['committed_chunks'] += 1
+                chunk = []
+        if chunk:
+            add_results(_store_readings(data_source_id, chunk))
+            progress['committed_chunks'] += 1
+
+        progress['errors'] = errors
+        progress['errors_truncated'] = progress['rejected'] > len(errors)
+        return progress
+
+    def queue_data(self, data_source_id: int,
+                   create_data_source_data_dto: CreateDataSourceDataDto):
+        """Queues a data point in the write-behind ingestion buffer. The data
+        point is written to the database by the background flusher.
+
+        Arguments:
+            data_source_id {int} -- id of data source
+            create_data_source_data_dto {CreateDataSourceDataDto} --
+            Data transfer object containing the payload for the data point
+
+        Raises:
+            ValueError: Data source not found with given id
+            ValueError: Body is invalid
+
+        Returns:
+            dict -- The queued data point
+        """
+        data_source_id = _DataSourceService.check_data_source_exists(
+            self, data_source_id)
+
+        if not create_data_source_data_dto:
+            raise ValueError(HTTPStatus.BAD_REQUEST, 'Body is required')
+        try:
+            row = _reading_to_row(data_source_id, create_data_source_data_dto)
+        except ValueError as err:
+            raise ValueError(HTTPStatus.BAD_REQUEST, str(err))
+
+        dedup_key = _get_dedup_key(row)
+        if dedup_key and dedup_key in _recent_idempotency_keys:
+            return _duplicate_reading(row)
+
+        try:
+            _ingestion_buffer.append(row)
+        except RuntimeError as err:
+            raise ValueError(HTTPStatus.SERVICE_UNAVAILABLE, str(err))
+        if dedup_key:
+            _recent_idempotency_keys.add(dedup_key)
+        return row
+
+    def start_ingestion_buffer(self):
+        """Replays un-flushed readings and starts the background flusher"""
+        _ingestion_buffer.start()
+
+    def stop_ingestion_buffer(self):
+        """Stops the background flusher and flushes the queued readings"""
+        _ingestion_buffer.stop()
@@ -0,0 +1,379 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from http import HTTPStatus
+
+from peewee import SQL, chunked, fn
+
+from api.helpers import to_columns, to_epoch, validate_dateformat
+from api.models import (DataSourceData, DataSourceDataDaily,
+                        DataSourceDataHourly, database, use_replica)
+
+_UPSERT_CHUNK_SIZE = 1000
+# The devices that are always connected are not counted as occasional
+# clients, the forecasts are trained on the occasional clients
+ALWAYS_CONNECTED_CLIENTS = 8
+# The rollup models and the format that truncates a date to their bucket, the
+# same format is used by DATE_FORMAT when the rollups are rebuilt
+_ROLLUPS = (
+    (DataSourceDataHourly, '%Y-%m-%d %H:00:00'),
+    (DataSourceDataDaily, '%Y-%m-%d 00:00:00'),
+)
+# The seconds per bucket of the aggregation and the rollup that contains the
+# buckets, buckets without a rollup are aggregated from the readings
+_AGGREGATION_BUCKETS = {
+    '10m': (600, None),
+    '1h': (3600, DataSourceDataHourly),
+    '1d': (86400, DataSourceDataDaily),
+}
+_AGGREGATES = ('mean', 'min', 'max', 'count')
+
+
+def _to_datetime(created_date):
+    if isinstance(created_date, datetime):
+        return created_date
+    return datetime.strptime(created_date, '%Y-%m-%d %H:%M:%S')
+
+
+def _to_day_range(start_date: str, end_date: str):
+    """Converts an inclusive range of days to a half-open range of dates
+
+    Arguments:
+        start_date {str} -- first day in YYYY-mm-dd format, may be None
+        end_date {str} -- last day in YYYY-mm-dd format, may be None
+
+    Raises:
+        ValueError: Invalid start or end date
+
+    Returns:
+        tuple -- the start of the first day and the start of the day after
+        the last day, None for a missing date
+    """
+    start, end = None, None
+    try:
+        if start_date:
+            validate_dateformat('start_date', start_date)
+            start = datetime.strptime(start_date, '%Y-%m-%d')
+        if end_date:
+            validate_dateformat('end_date', end_date)
+            # The end date is inclusive
+            end = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)
+    except ValueError as err:
+        raise ValueError(HTTPStatus.BAD_REQUEST, str(err))
+    return start, end
+
+
+def _aggregate_rows(rows: list, bucket_format: str):
+    """Aggregates DataSourceData rows per data source and bucket
+
+    Arguments:
+        rows {list} -- rows containing data_source, no_of_clients and
+        created_date
+        bucket_format {str} -- format that truncates a date to its bucket
+
+    Returns:
+        list -- rollup rows, sorted by data source and bucket
+    """
+    aggregates = {}
+    for row in rows:
+        key = (row['data_source'],
+               _to_datetime(row['created_date']).strftime(bucket_format))
+        no_of_clients = row['no_of_clients']
+        no_of_occasional_clients = max(
+            no_of_clients - ALWAYS_CONNECTED_CLIENTS, 0)
+        aggregate = aggregates.get(key)
+        if aggregate is None:
+            aggregates[key] = {
+                'data_source': key[0],
+                'bucket': key[1],
+                'no_of_readings': 1,
+                'sum_of_clients': no_of_clients,
+                'sum_of_occasional_clients': no_of_occasional_clients,
+                'min_of_clients': no_of_clients,
+                'max_of_clients': no_of_clients
+            }
+        else:
+            aggregate['no_of_readings'] += 1
+            aggregate['sum_of_clients'] += no_of_clients
+            aggregate['sum_of_occasional_clients'] += \
+                no_of_occasional_clients
+            aggregate['min_of_clients'] = min(aggregate['min_of_clients'],
+                                              no_of_clients)
+            aggregate['max_of_clients'] = max(aggregate['max_of_clients'],
+                                              no_of_clients)
+    # A fixed order of the upserted rows prevents deadlocks between
+    # concurrent ingests
+    return [aggregates[key] for key in sorted(aggregates)]
+
+
+def _parse_aggregates(aggregates: str):
+    names = list(
+        dict.fromkeys(name.strip().lower() for name in aggregates.split(',')
+                      if name.strip()))
+    if not names or any(name not in _AGGREGATES for name in names):
+        raise ValueError(
+            HTTPStatus.BAD_REQUEST,
+            f'Invalid agg value, only a comma separated list of '
+            f'{", ".join(_AGGREGATES)} is allowed')
+    return names
+
+
+def _select_readings_aggregates(seconds: int):
+    """Creates the expressions that aggregate the readings per bucket
+
+    Arguments:
+        seconds {int} -- seconds per bucket
+
+    Returns:
+        tuple -- the expression of the bucket, as seconds since the epoch,
+        and the expression of every aggregate
+    """
+    # TIMESTAMPDIFF does not depend on the time zone of the session
+    bucket = fn.FLOOR(
+        fn.TIMESTAMPDIFF(SQL('SECOND'), '1970-01-01',
+                         DataSourceData.created_date) / seconds) * seconds
+    return bucket, {
+        # The average is not converted to the integer type of the field
+        'mean': fn.AVG(DataSourceData.no_of_clients).coerce(False),
+        'min': fn.MIN(DataSourceData.no_of_clients),
+        'max': fn.MAX(DataSourceData.no_of_clients),
+        'count': fn.COUNT(DataSourceData.id)
+    }
+
+
+def _select_rollup_aggregates(model):
+    return model.bucket, {
+        'mean': model.sum_of_clients / model.no_of_readings,
+        'min': model.min_of_clients,
+        'max': model.max_of_clients,
+        'count': model.no_of_readings
+    }
+
+
+def _to_number(value):
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def _get_upsert_update(model):
+    return {
+        model.no_of_readings:
+        model.no_of_readings + fn.VALUES(model.no_of_readings),
+        model.sum_of_clients:
+        model.sum_of_clients + fn.VALUES(model.sum_of_clients),
+        model.sum_of_occasional_clients:
+        model.sum_of_occasional_clients +
+        fn.VALUES(model.sum_of_occasional_clients),
+        model.min_of_clients:
+        fn.LEAST(model.min_of_clients, fn.VALUES(model.min_of_clients)),
+        model.max_of_clients:
+        fn.GREATEST(model.max_of_clients, fn.VALUES(model.max_of_clients))
+    }
+
+
+class DataSourceDataRollupService():
+    def add_rows_to_rollups(self, rows: list):
+        """Adds newly stored readings to the hourly and daily rollups, should
+        be called in the transaction that stores the readings
+
+        Arguments:
+            rows {list} -- rows containing data_source, no_of_clients and
+            created_date
+        """
+        for model, bucket_format in _ROLLUPS:
+            for chunk in chunked(_aggregate_rows(rows, bucket_format),
+                                 _UPSERT_CHUNK_SIZE):
+                model.insert_many(chunk).on_conflict(
+                    update=_get_upsert_update(model)).execute()
+
+    def rebuild_rollups(self,
+                        data_source_id: int = None,
+                        start_date: str = None,
+                        end_date: str = None):
+        """Rebuilds the hourly and daily rollups from the stored readings.
+        The rollups of the days before the oldest stored reading are kept,
+        as their readings may have been archived.
+
+        Keyword Arguments:
+            data_source_id {int} -- only rebuild the rollups of this data
+            source (default: {None})
+            start_date {str} -- first day to rebuild in YYYY-mm-dd format
+            (default: {None})
+            end_date {str} -- last day to rebuild in YYYY-mm-dd format
+            (default: {None})
+
+        Raises:
+            ValueError: Invalid start or end date
+
+        Returns:
+            dict -- number of hourly and daily rollup rows that have been
+            rebuilt
+        """
+        start, end = _to_day_range(start_date, end_date)
+
+        oldest_date = DataSourceData.select(fn.MIN(
+            DataSourceData.created_date)).scalar()
+        if oldest_date is None:
+            return {model._meta.table_name: 0 for model, _ in _ROLLUPS}
+        oldest_day = _to_datetime(oldest_date).replace(hour=0,
+                                                       minute=0,
+                                                       second=0,
+                                                       microsecond=0)
+        if start is None or start < oldest_day:
+            start = oldest_day
+
+        result = {}
+        with database.atomic():
+            for model, bucket_format in _ROLLUPS:
+                rollup_conditions, reading_conditions = [], []
+                if data_source_id is not None:
+                    rollup_conditions.append(
+                        model.data_source == data_source_id)
+                    reading_conditions.append(
+                        DataSourceData.data_source == data_source_id)
+                if start:
+                    rollup_conditions.append(model.bucket >= start)
+                    reading_conditions.append(
+                        DataSourceData.created_date >= start)
+                if end:
+                    rollup_conditions.append(model.bucket < end)
+                    reading_conditions.append(
+                        DataSourceData.created_date < end)
+
+                delete_query = model.delete()
+                rollup_query = model.select()
+                bucket = fn.DATE_FORMAT(DataSourceData.created_date,
+                                        bucket_format)
+                readings_query = DataSourceData.select(
+                    DataSourceData.data_source, bucket,
+                    fn.COUNT(DataSourceData.id),
+                    fn.SUM(DataSourceData.no_of_clients),
+                    fn.SUM(
+                        fn.GREATEST(
+                            DataSourceData.no_of_clients -
+                            ALWAYS_CONNECTED_CLIENTS, 0)),
+                    fn.MIN(DataSourceData.no_of_clients),
+                    fn.MAX(DataSourceData.no_of_clients)).group_by(
+                        DataSourceData.data_source, bucket)
+                if rollup_conditions:
+                    delete_query = delete_query.where(*rollup_conditions)
+                    rollup_query = rollup_query.where(*rollup_conditions)
+                    readings_query = readings_query.where(
+                        *reading_conditions)
+
+                delete_query.execute()
+                model.insert_from(readings_query, [
+                    model.data_source, model.bucket, model.no_of_readings,
+                    model.sum_of_clients, model.sum_of_occasional_clients,
+                    model.min_of_clients, model.max_of_clients
+                ]).execute()
+                result[model._meta.table_name] = rollup_query.count()
+        return result
+
+    @use_replica
+    def get_hourly_data_from_data_source(self,
+                                         data_source_id: int,
+                                         start_date: str,
+                                         end_date: str,
+                                         occasional_clients: bool = False):
+        """Retrieves the average number of clients per hour of a data source
+
+        Arguments:
+            data_source_id {int} -- data source id
+            start_date {str} -- start date in YYYY-mm-dd format
+            end_date {str} -- end date in YYYY-mm-dd format
+
+        Keyword Arguments:
+            occasional_clients {bool} -- averages the clients of every reading
+            minus the clients that are always connected, at least 0 per
+            reading (default: {False})
+
+        Returns:
+            list -- hours in ascending order, every hour contains the same
+            fields as a data point, created_date is the start of the hour
+        """
+        query = DataSourceDataHourly.select().where(
+            DataSourceDataHourly.data_source_id == data_source_id)
+        if start_date:
+            query = query.where(DataSourceDataHourly.bucket >= start_date)
+        if end_date:
+            query = query.where(DataSourceDataHourly.bucket <= end_date)
+
+        return [{
+            'id': rollup.id,
+            'data_source': rollup.data_source_id,
+            'no_of_clients': (rollup.sum_of_occasional_clients
+                              if occasional_clients else
+                              rollup.sum_of_clients) / rollup.no_of_readings,
+            'created_date': rollup.bucket
+        } for rollup in query.order_by(DataSourceDataHourly.bucket.asc())]
+
+    @use_replica
+    def get_aggregated_data_from_data_source(self,
+                                             data_source_id: int,
+                                             bucket: str,
+                                             aggregates: str,
+                                             start_date: str = None,
+                                             end_date: str = None):
+        """Aggregates the number of clients of a data source per bucket. The
+        hourly and daily buckets are read from the rollups, smaller buckets
+        are grouped by the database.
+
+        Arguments:
+            data_source_id {int} -- data source id
+            bucket {str} -- size of the buckets, 10m, 1h or 1d, defaults to 1h
+            aggregates {str} -- comma separated aggregates, of mean, min, max
+            and count, defaults to mean
+
+        Keyword Arguments:
+            start_date {str} -- first day in YYYY-mm-dd format
+            (default: {None})
+            end_date {str} -- last day in YYYY-mm-dd format (default: {None})
+
+        Raises:
+            ValueError: Invalid bucket, aggregates, start or end date
+
+        Returns:
+            dict -- a list of values per column, bucket contains the start of
+            every bucket as seconds since the epoch, in ascending order,
+            followed by a column per aggregate
+        """
+        # Set defaults
+        if not bucket:
+            bucket = '1h'
+        if not aggregates:
+            aggregates = _AGGREGATES[0]
+
+        if bucket not in _AGGREGATION_BUCKETS:
+            raise ValueError(
+                HTTPStatus.BAD_REQUEST,
+                f'Invalid bucket value, only '
+                f'{", ".join(_AGGREGATION_BUCKETS)} are allowed')
+        names = _parse_aggregates(aggregates)
+        start, end = _to_day_range(start_date, end_date)
+
+        seconds, model = _AGGREGATION_BUCKETS[bucket]
+        if model is None:
+            bucket_expression, expressions = _select_readings_aggregates(
+                seconds)
+            query = DataSourceData.select(
+                bucket_expression.alias('bucket'),
+                *[expressions[name] for name in names]).where(
+                    DataSourceData.data_source_id == data_source_id).group_by(
+                        SQL('bucket')).order_by(SQL('bucket'))
+            date_field = DataSourceData.created_date
+        else:
+            bucket_expression, expressions = _select_rollup_aggregates(model)
+            query = model.select(
+                bucket_expression,
+                *[expressions[name] for name in names]).where(
+                    model.data_source_id == data_source_id).order_by(
+                        model.bucket.asc())
+            date_field = model.bucket
+        if start:
+            query = query.where(date_field >= start)
+        if end:
+            query = query.where(date_field < end)
+
+        rows = [(int(row[0]) if model is None else to_epoch(row[0]), ) +
+                tuple(_to_number(value) for value in row[1:])
+                for row in query.tuples()]
+        return to_columns(['bucket'] + names, rows)
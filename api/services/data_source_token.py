@@ -1,18 +1,67 @@
+import threading
+import time
 from datetime import datetime
 from http import HTTPStatus
 
 from dateutil.relativedelta import relativedelta
 from flask_jwt_extended import create_access_token
-from peewee import DoesNotExist
+from peewee import Case, DoesNotExist
 from playhouse.shortcuts import dict_to_model, model_to_dict
 
-from api.helpers import (add_extra_info_to_dict, remove_items_from_dict,
-                         to_utc_datetime)
+from api.helpers import (TimedLRUCache, add_extra_info_to_dict,
+                         remove_items_from_dict, to_utc_datetime)
 from api.models import DataSource, DataSourceToken, User
+from api.settings import (TOKEN_STATE_CACHE_SIZE, TOKEN_STATE_CACHE_TTL,
+                          TOKEN_STATE_VERSION_CHECK_INTERVAL)
 
 from .data_source import DataSourceService as _DataSourceService
+from .data_version import DataVersionService as _DataVersionService
 from .user import UserService as _UserService
 
+_TOKEN_STATE_VERSION_NAME = 'data_source_token'
+
+# Caches the active state of data source tokens, the key is the token id.
+# Revocations in other processes are noticed by polling the data version of
+# the tokens every TOKEN_STATE_VERSION_CHECK_INTERVAL seconds.
+_token_state_cache = TimedLRUCache(max_size=TOKEN_STATE_CACHE_SIZE,
+                                   ttl=TOKEN_STATE_CACHE_TTL)
+_token_state_version = {'version': None, 'checked_at': 0.0}
+_token_state_version_lock = threading.Lock()
+
+# Token usage is aggregated in memory and periodically flushed to the
+# database, the key is the token id and the value is a list containing the
+# number of hits and the last activity date.
+_usage_counters = {}
+_usage_counters_lock = threading.Lock()
+
+
+def _merge_usage_counters(counters: dict):
+    with _usage_counters_lock:
+        for token_id, (hits, last_activity_date) in counters.items():
+            counter = _usage_counters.get(token_id)
+            if counter is None:
+                _usage_counters[token_id] = [hits, last_activity_date]
+            else:
+                counter[0] += hits
+
+
+def _sync_token_state_cache():
+    """Clears the token state cache when the token data version has been
+    bumped by any process"""
+    if (time.monotonic() - _token_state_version['checked_at'] <
+            TOKEN_STATE_VERSION_CHECK_INTERVAL):
+        return
+    with _token_state_version_lock:
+        if (time.monotonic() - _token_state_version['checked_at'] <
+                TOKEN_STATE_VERSION_CHECK_INTERVAL):
+            return
+        version = _DataVersionService.get_version(_DataVersionService,
+                                                  _TOKEN_STATE_VERSION_NAME)
+        if version != _token_state_version['version']:
+            _token_state_cache.clear()
+            _token_state_version['version'] = version
+        _token_state_version['checked_at'] = time.monotonic()
+
 
 class DataSourceTokenService():
     def get_token_by_id(self, id: int):
@@ -101,27 +150,57 @@ class DataSourceTokenService():
                     'Unable to create token for data source {}'.format(
                         data_source_id))
 
-    def update_hit_count_and_date(self, data_source_token_id: int):
-        """Update the hit counter of an data source token
+    def record_token_usage(self, data_source_token_id: int):
+        """Increments the in-memory hit counter of an data source token. The
+        counters are written to the database by flush_token_usage.
 
         Arguments:
             data_source_token_id {int} -- Id of data source token
+        """
+        last_activity_date = to_utc_datetime()
+        with _usage_counters_lock:
+            counter = _usage_counters.get(data_source_token_id)
+            if counter is None:
+                _usage_counters[data_source_token_id] = [
+                    1, last_activity_date
+                ]
+            else:
+                counter[0] += 1
+                counter[1] = last_activity_date
+
+    def flush_token_usage(self):
+        """Writes the aggregated hit counters and last activity dates of all
+        data source tokens to the database using a single UPDATE query
 
         Returns:
-            HTTPstatus code -- 204 No Content
+            int -- Number of updated tokens
         """
-        data_source_token = DataSourceTokenService.get_token_by_id(
-            self, data_source_token_id)
-        if data_source_token is not None:
-            data_source_token.no_of_usage += 1
-            data_source_token.last_activity_date = to_utc_datetime()
-            data_source_token.save()
-            return HTTPStatus.NO_CONTENT
-        else:
+        with _usage_counters_lock:
+            if not _usage_counters:
+                return 0
+            counters = dict(_usage_counters)
+            _usage_counters.clear()
+
+        try:
+            return DataSourceToken.update(
+                no_of_usage=DataSourceToken.no_of_usage + Case(
+                    DataSourceToken.id,
+                    [(token_id, hits)
+                     for token_id, (hits, _) in counters.items()], 0),
+                last_activity_date=Case(
+                    DataSourceToken.id,
+                    [(token_id, last_activity_date)
+                     for token_id, (_, last_activity_date)
+                     in counters.items()],
+                    DataSourceToken.last_activity_date)).where(
+                        DataSourceToken.id.in_(list(counters))).execute()
+        except Exception:
+            # Keep the counts so they are written on the next flush
+            _merge_usage_counters(counters)
             raise
 
     def check_if_token_is_active(self, data_source_token_id: int):
-        """Check if token is active
+        """Check if token is active, the state of the token is cached
 
         Arguments:
             data_source_token_id {int} -- Id of data source token
@@ -129,15 +208,28 @@ class DataSourceTokenService():
         Returns:
             Boolean -- True if token is active, else False
         """
-        data_source_token = DataSourceTokenService.get_token_by_id(
-            self, data_source_token_id)
-        if data_source_token is not None:
-            if data_source_token.is_active:
-                return True
-            else:
-                return False
-        else:
-            raise
+        _sync_token_state_cache()
+        is_active = _token_state_cache.get(data_source_token_id)
+        if is_active is None:
+            data_source_token = DataSourceTokenService.get_token_by_id(
+                self, data_source_token_id)
+            is_active = bool(data_source_token.is_active)
+            _token_state_cache.set(data_source_token_id, is_active)
+        return is_active
+
+    def invalidate_token_state(self, data_source_token_id: int):
+        """Removes the cached state of a token and notifies the other
+        processes that the state of a token has changed
+
+        Arguments:
+            data_source_token_id {int} -- Id of data source token
+        """
+        # The cache is keyed by the integer id of the token identity
+        _token_state_cache.invalidate(int(data_source_token_id))
+        _DataVersionService.bump_version(_DataVersionService,
+                                         _TOKEN_STATE_VERSION_NAME)
+        # The next check syncs with the bumped version right away
+        _token_state_version['checked_at'] = 0.0
 
     def admin_revoke_token(self, data_source_token_id: int):
         """Revokes token of data source as an admin.
@@ -155,6 +247,8 @@ class DataSourceTokenService():
                 data_source_token.is_active = False
                 data_source_token.deactivated_since = to_utc_datetime()
                 data_source_token.save()
+                DataSourceTokenService.invalidate_token_state(
+                    self, data_source_token_id)
                 return model_to_dict(data_source_token, recurse=False)
             else:
                 return_dict = model_to_dict(data_source_token, recurse=False)
@@ -0,0 +1,54 @@
+from api.helpers import to_utc_datetime
+from api.models import DataVersion
+
+# Data sets whose version is bumped on every change, the versions are used as
+# validators of conditional requests
+WEATHER_VERSION_NAME = 'weather'
+CROWD_FORECAST_VERSION_NAME = 'crowd_forecast'
+
+
+class DataVersionService():
+    def get_version(self, name: str):
+        """Retrieves the current version of a data set
+
+        Arguments:
+            name {str} -- name of the data set
+
+        Returns:
+            int -- version of the data set, 0 if it has never been changed
+        """
+        data_version = DataVersion.get_or_none(DataVersion.name == name)
+        if data_version is None:
+            return 0
+        return data_version.version
+
+    def get_version_info(self, name: str):
+        """Retrieves the current version of a data set and the date of its
+        last change
+
+        Arguments:
+            name {str} -- name of the data set
+
+        Returns:
+            tuple -- version of the data set, 0 if it has never been changed,
+            and the UTC date of the last change, None if it has never been
+            changed
+        """
+        data_version = DataVersion.get_or_none(DataVersion.name == name)
+        if data_version is None:
+            return 0, None
+        return data_version.version, data_version.updated_date
+
+    def bump_version(self, name: str):
+        """Increments the version of a data set
+
+        Arguments:
+            name {str} -- name of the data set
+        """
+        updated_date = to_utc_datetime()
+        DataVersion.insert(
+            name=name, version=1, updated_date=updated_date).on_conflict(
+                update={
+                    DataVersion.version: DataVersion.version + 1,
+                    DataVersion.updated_date: updated_date
+                }).execute()
@@ -1,3 +1,5 @@
+import threading
+import time
 from http import HTTPStatus
 
 from pandas import DataFrame, read_json, to_datetime
@@ -8,26 +10,112 @@ from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.svm import SVR
 
 import api.helpers.data_frame_helper as _df_helper
-from api.helpers import (to_utc_datetime, validate_dateformat,
+from api.helpers import (SuccessObject, TimedLRUCache, dumps,
+                         to_utc_datetime, validate_dateformat,
                          validate_string_bool, validate_string_int)
-from api.models import CrowdForecast
+from api.models import CrowdForecast, use_replica
+from api.settings import (FORECAST_CACHE_SIZE, FORECAST_CACHE_TTL,
+                          FORECAST_VERSION_CHECK_INTERVAL)
 
-from .data_source_data import DataSourceDataService as _DataSourceDataService
+from .data_source_data_rollup import \
+    DataSourceDataRollupService as _DataSourceDataRollupService
+from .data_version import CROWD_FORECAST_VERSION_NAME
+from .data_version import DataVersionService as _DataVersionService
 
 _label_encoder = LabelEncoder()
 
+# Caches the finished forecast responses, the key contains the version of
+# the crowd forecasts. New forecasts of other processes are noticed by
+# polling the version every FORECAST_VERSION_CHECK_INTERVAL seconds.
+_forecast_cache = TimedLRUCache(max_size=FORECAST_CACHE_SIZE,
+                                ttl=FORECAST_CACHE_TTL)
+_forecast_version = {'version': None, 'checked_at': 0.0}
+_forecast_version_lock = threading.Lock()
+
+
+def _is_forecast_version_current(min_version: int = None):
+    if min_version is not None and \
+            (_forecast_version['version'] or 0) < min_version:
+        return False
+    return (time.monotonic() - _forecast_version['checked_at'] <
+            FORECAST_VERSION_CHECK_INTERVAL)
+
+
+def _get_forecast_version(min_version: int = None):
+    """Retrieves the version of the crowd forecasts, the cache is cleared
+    when the version has been bumped by any process
+
+    Keyword Arguments:
+        min_version {int} -- version that is known to exist, the version is
+        checked immediately if it is older (default: {None})
+
+    Returns:
+        int -- version of the crowd forecasts
+    """
+    if _is_forecast_version_current(min_version):
+        return _forecast_version['version']
+    with _forecast_version_lock:
+        if not _is_forecast_version_current(min_version):
+            version = _DataVersionService.get_version(
+                _DataVersionService, CROWD_FORECAST_VERSION_NAME)
+            if version != _forecast_version['version']:
+                _forecast_cache.clear()
+                _forecast_version['version'] = version
+            _forecast_version['checked_at'] = time.monotonic()
+        return _forecast_version['version']
+
+
+def _invalidate_forecast_cache():
+    with _forecast_version_lock:
+        _forecast_version['checked_at'] = 0.0
+    _forecast_cache.clear()
+
+
+def _validate_forecast_params(start_date: str, end_date: str,
+                              return_data_frame):
+    if not return_data_frame:
+        return_data_frame = False
+    try:
+        validate_dateformat("start_date", start_date)
+        validate_dateformat("end_date", end_date)
+    except ValueError as err:
+        raise ValueError(HTTPStatus.BAD_REQUEST, str(err))
+
+    try:
+        return validate_string_bool(return_data_frame)
+    except ValueError as err:
+        raise ValueError(HTTPStatus.BAD_REQUEST, str(err))
+
+
+def _select_crowd_forecast(start_date: str, end_date: str,
+                           return_data_frame: bool):
+    try:
+        result = CrowdForecast.select().where(
+            CrowdForecast.prediction_start_date == start_date,
+            CrowdForecast.prediction_end_date == end_date).order_by(
+            CrowdForecast.id.desc()).get()
+        if return_data_frame:
+            dataframe = read_json(result.prediction_data)
+            dataframe['created_date'] = to_datetime(
+                dataframe['created_date'], unit='ms')
+            return(dataframe.to_json())
+        else:
+            return model_to_dict(result)
+    except DoesNotExist as err:
+        print(err)
+        raise ValueError(HTTPStatus.NOT_FOUND,
+                         "Unable to find forecast for given dates.")
+    except Exception as err:
+        print(err)
+        raise ValueError(HTTPStatus.INTERNAL_SERVER_ERROR,
+                         "Internal error has occured.")
+
 
 def _transform_data_to_dataframe(data):
     data_frame = DataFrame(data)
     # flooring the seconds
     data_frame['created_date'] = data_frame['created_date'].map(
         lambda x: x.replace(second=0))
-    # Subtract the 8 devices/clients that are always connected, it needs to be
-    # a variable instead of a static constant.
-    # Since the number of always connected clients may vary (for example since
-    # december there are only 7 always connected clients)
-    data_frame['no_of_clients'] = data_frame['no_of_clients'] - 8
-    data_frame.loc[data_frame['no_of_clients'] < 0, 'no_of_clients'] = 0
     return data_frame
 
 
@@ -115,13 +203,21 @@ class ForecastService():
                 start_date=start_date,
                 number_of_weeks=validate_string_int(number_of_weeks_to_use),
                 use_start_of_the_week=use_start_of_the_week)
-            data = _DataSourceDataService.get_all_data_from_data_source(
-                _DataSourceDataService,
-                data_source_id=2,
-                limit=10000,
-                start_date=start,
-                end_date=end
-            )
+            # The hourly rollups are used, so the raw readings do not have
+            # to be loaded and resampled. The 8 devices/clients that are
+            # always connected are subtracted from every reading when it is
+            # added to the rollups, the number needs to be a variable instead
+            # of a static constant. Since the number of always connected
+            # clients may vary (for example since december there are only 7
+            # always connected clients)
+            data = _DataSourceDataRollupService.\
+                get_hourly_data_from_data_source(
+                    _DataSourceDataRollupService,
+                    data_source_id=2,
+                    start_date=start,
+                    end_date=end,
+                    occasional_clients=True
+                )
 
             data_frame = _transform_data_to_dataframe(data)
             data_frame = _add_time_characteristics(data_frame)
@@ -157,6 +253,9 @@ class ForecastService():
                 prediction_end_date=next_week_end.strftime('%Y-%m-%d'),
                 prediction_data=next_week_dataframe.to_json()
             )
+            _DataVersionService.bump_version(_DataVersionService,
+                                             CROWD_FORECAST_VERSION_NAME)
+            _invalidate_forecast_cache()
             return model_to_dict(result)
         except IntegrityError as err:
             print(err)  # replace with a logger
@@ -171,6 +270,7 @@ class ForecastService():
             raise ValueError(HTTPStatus.INTERNAL_SERVER_ERROR,
                              "Internal error has occured.")
 
+    @use_replica
     def get_crowd_forecast(
             self,
             start_date: str,
@@ -188,36 +288,47 @@ class ForecastService():
             return_data_frame {bool} -- If True, returns a jsonified
             dataframe (default: {False})
         """
-        if not return_data_frame:
-            return_data_frame = False
-        try:
-            validate_dateformat("start_date", start_date)
-            validate_dateformat("end_date", end_date)
-        except ValueError as err:
-            raise ValueError(HTTPStatus.BAD_REQUEST, str(err))
+        return _select_crowd_forecast(
+            start_date, end_date,
+            _validate_forecast_params(start_date, end_date, return_data_frame))
 
-        try:
-            return_data_frame_bool = validate_string_bool(return_data_frame)
-        except ValueError as err:
-            raise ValueError(HTTPStatus.BAD_REQUEST, str(err))
+    def get_crowd_forecast_response(
+            self,
+            start_date: str,
+            end_date: str,
+            return_data_frame: bool = False,
+            min_version: int = None):
+        """Get the JSON encoded response of the crowd forecast for given
+        dates. Responses are cached until a new forecast is created.
 
-        try:
-            result = CrowdForecast.select().where(
-                CrowdForecast.prediction_start_date == start_date,
-                CrowdForecast.prediction_end_date == end_date).order_by(
-                CrowdForecast.id.desc()).get()
-            if return_data_frame_bool:
-                dataframe = read_json(result.prediction_data)
-                dataframe['created_date'] = to_datetime(
-                    dataframe['created_date'], unit='ms')
-                return(dataframe.to_json())
-            else:
-                return model_to_dict(result)
-        except DoesNotExist as err:
-            print(err)
-            raise ValueError(HTTPStatus.NOT_FOUND,
-                             "Unable to find forecast for given dates.")
-        except Exception as err:
-            print(err)
-            raise ValueError(HTTPStatus.INTERNAL_SERVER_ERROR,
-                             "Internal error has occured.")
+        Arguments:
+            start_date {str} -- start date of prediction, accepted
+            format '%Y-%m-%d'
+            end_date {str} -- end date of prediction, accepted
+            format '%Y-%m-%d'
+
+        Keyword Arguments:
+            return_data_frame {bool} -- If True, the response contains a
+            jsonified dataframe (default: {False})
+            min_version {int} -- version of the crowd forecasts the response
+            must not be older than, e.g. the version of its ETag
+            (default: {None})
+
+        Returns:
+            bytes -- the JSON encoded response
+        """
+        return_data_frame_bool = _validate_forecast_params(
+            start_date, end_date, return_data_frame)
+        key = (_get_forecast_version(min_version), start_date, end_date,
+               return_data_frame_bool)
+        response = _forecast_cache.get(key)
+        if response is None:
+            # The forecast is read from the primary database, so a lagging
+            # replica cannot put an outdated forecast in the cache
+            data = _select_crowd_forecast(start_date, end_date,
+                                          return_data_frame_bool)
+            response = dumps(
+                SuccessObject.create_response(SuccessObject, HTTPStatus.OK,
+                                              data)).encode('utf-8')
+            _forecast_cache.set(key, response)
+        return response
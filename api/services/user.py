@@ -212,6 +212,9 @@ class UserService():
                 data_source_token.is_active = False
                 data_source_token.deactivated_since = to_utc_datetime()
                 data_source_token.save()
+                from .data_source_token import DataSourceTokenService
+                DataSourceTokenService.invalidate_token_state(
+                    DataSourceTokenService, data_source_token_id)
                 return model_to_dict(data_source_token, recurse=False)
             else:
                 return_dict = model_to_dict(data_source_token, recurse=False)
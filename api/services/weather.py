@@ -1,17 +1,251 @@
 import json
+import re
+from datetime import datetime
 from http import HTTPStatus
 
+from peewee import fn
 from playhouse.shortcuts import model_to_dict
 
-from api.helpers import to_utc_datetime, filter_items_from_list, validate_dateformat
-from api.models import Weather, Forecast
+from api.helpers import (apply_cursor, encode_cursor, filter_items_from_list,
+                         to_columns, to_utc_datetime, validate_dateformat)
+from api.models import Weather, Forecast, database, use_replica
 from api.settings import OPEN_WEATHER_API_KEY
 from api.wrapper import OpenWeatherClient
 
+from .data_version import DataVersionService as _DataVersionService
+from .data_version import WEATHER_VERSION_NAME
+
 _ALLOWED_SORT_VALUES = ['asc', 'desc']
+_CURSOR_ORDER_BY_VALUES = ['id', 'created_date']
+_BACKFILL_CHUNK_SIZE = 1000
+# Columns of the columnar format, the id is the first column and the raw
+# data is left out
+_COLUMNAR_FIELDS = tuple(field for field in Weather._meta.sorted_fields
+                         if field is not Weather.data)
+_COLUMNAR_CREATED_DATE_INDEX = [field.name for field in _COLUMNAR_FIELDS
+                                ].index('created_date')
+_COLUMNAR_EPOCH_COLUMNS = ('created_date', 'measured_date')
+_FIELD_KEY_PATTERN = re.compile(r'^[A-Za-z0-9_]+$')
+_MAX_FIELDS = 20
 _client = OpenWeatherClient(OPEN_WEATHER_API_KEY, 'Amsterdam', 'NL')
 
 
+def _get_number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return value
+
+
+def _extract_weather_columns(weather_data):
+    """Extracts the typed columns from a current weather response of
+    OpenWeatherMap
+
+    Arguments:
+        weather_data {str} -- current weather as JSON text
+
+    Returns:
+        dict -- values of the typed columns, values that are missing in the
+        response are None
+    """
+    try:
+        data = json.loads(weather_data)
+    except (TypeError, ValueError):
+        data = None
+    if not isinstance(data, dict):
+        return {}
+
+    def get_section(name):
+        section = data.get(name)
+        return section if isinstance(section, dict) else {}
+
+    main = get_section('main')
+    rain = get_section('rain')
+    weather = data.get('weather')
+    weather = weather[0] if isinstance(weather, list) and weather and \
+        isinstance(weather[0], dict) else {}
+    measured_date = _get_number(data.get('dt'))
+    return {
+        'measured_date':
+        to_utc_datetime(datetime.utcfromtimestamp(measured_date))
+        if measured_date is not None else None,
+        'temp': _get_number(main.get('temp')),
+        'temp_min': _get_number(main.get('temp_min')),
+        'temp_max': _get_number(main.get('temp_max')),
+        'humidity': _get_number(main.get('humidity')),
+        'pressure': _get_number(main.get('pressure')),
+        'wind_speed': _get_number(get_section('wind').get('speed')),
+        'clouds': _get_number(get_section('clouds').get('all')),
+        'rain_1h': _get_number(rain.get('1h')),
+        'rain_3h': _get_number(rain.get('3h')),
+        'weather_main': weather.get('main'),
+        'weather_description': weather.get('description')
+    }
+
+
+def _parse_fields(fields: str):
+    """Parses the requested fields of the raw data
+
+    Arguments:
+        fields {str} -- comma separated dotted paths, e.g. main.temp,wind.speed
+
+    Raises:
+        ValueError: Invalid fields
+
+    Returns:
+        list -- the keys of every path
+    """
+    paths = list(
+        dict.fromkeys(path.strip() for path in fields.split(',')
+                      if path.strip()))
+    if not paths:
+        raise ValueError(HTTPStatus.BAD_REQUEST, 'No fields provided')
+    if len(paths) > _MAX_FIELDS:
+        raise ValueError(HTTPStatus.BAD_REQUEST,
+                         f'At most {_MAX_FIELDS} fields are allowed')
+    for path in paths:
+        if not all(
+                _FIELD_KEY_PATTERN.match(key) for key in path.split('.')):
+            raise ValueError(
+                HTTPStatus.BAD_REQUEST,
+                f'Invalid field {path}, fields are dotted paths of keys '
+                f'such as main.temp')
+        for other_path in paths:
+            if other_path.startswith(path + '.'):
+                raise ValueError(
+                    HTTPStatus.BAD_REQUEST,
+                    f'Field {other_path} is part of field {path}')
+    return [path.split('.') for path in paths]
+
+
+def _extract_field(keys: list):
+    """Creates the expression that extracts a field from the raw data
+
+    Arguments:
+        keys {list} -- keys of the path of the field
+
+    Returns:
+        Function -- JSON_EXTRACT expression, that returns the value as JSON
+        text
+    """
+    json_path = '$' + ''.join(f'."{key}"' for key in keys)
+    # The raw responses are stored as JSON strings, JSON_UNQUOTE returns the
+    # documents they contain
+    return fn.JSON_EXTRACT(fn.JSON_UNQUOTE(Weather.data),
+                           json_path).coerce(False)
+
+
+def _to_nested_data(field_keys: list, values):
+    data = {}
+    for keys, value in zip(field_keys, values):
+        node = data
+        for key in keys[:-1]:
+            node = node.setdefault(key, {})
+        node[keys[-1]] = value
+    return data
+
+
+def _order_weather_query(query, order_by_field, is_paginated: bool,
+                         sort: str, cursor: str):
+    """Orders a weather query, paginated queries are ordered by
+    (created_date, id) and continue after the row the cursor points to
+
+    Arguments:
+        query {ModelSelect} -- filtered weather query
+        order_by_field {Field} -- field to order by when not paginated
+        is_paginated {bool} -- True when ordered by id or created_date
+        sort {str} -- sorts the data in ascending or descending order
+        cursor {str} -- cursor of the page, None for the first page
+
+    Raises:
+        ValueError: Invalid sort or cursor value
+
+    Returns:
+        ModelSelect -- the ordered query
+    """
+    if sort.lower() not in _ALLOWED_SORT_VALUES:
+        raise ValueError(
+            HTTPStatus.BAD_REQUEST,
+            'Invalid sort value, only "asc" or "desc" are allowed')
+    if is_paginated:
+        try:
+            return apply_cursor(query, Weather.created_date, Weather.id,
+                                cursor,
+                                sort.lower() == _ALLOWED_SORT_VALUES[1])
+        except ValueError as err:
+            raise ValueError(HTTPStatus.BAD_REQUEST, str(err))
+    if cursor:
+        raise ValueError(
+            HTTPStatus.BAD_REQUEST,
+            'A cursor can only be used when ordering by id or created_date')
+    if sort.lower() == _ALLOWED_SORT_VALUES[0]:
+        return query.order_by(order_by_field.asc())
+    return query.order_by(order_by_field.desc())
+
+
+def _get_weather_page(query, limit: int, columnar: bool,
+                      field_keys: list = None):
+    """Retrieves the rows of an ordered weather query. A query that fetches
+    one row more than the limit is paginated.
+
+    Arguments:
+        query {ModelSelect} -- ordered and limited weather query
+        limit {int} -- number of rows of the page
+        columnar {bool} -- returns one list of values per typed column
+
+    Keyword Arguments:
+        field_keys {list} -- keys of the paths of the fields of the raw data
+        to return instead of the raw data, as parsed by _parse_fields
+        (default: {None})
+
+    Returns:
+        tuple -- An array of weather data, or a dictionary of columns in
+        columnar format, and the cursor of the next page, None on the last
+        page
+    """
+    field_keys = field_keys or []
+    column_names = [field.name for field in _COLUMNAR_FIELDS]
+    if columnar or field_keys:
+        all_data = list(
+            query.select(*_COLUMNAR_FIELDS,
+                         *[_extract_field(keys)
+                           for keys in field_keys]).tuples())
+        if field_keys:
+            # Only the extracted values are decoded, missing fields are None
+            all_data = [
+                row[:len(column_names)] + tuple(
+                    json.loads(value) if value is not None else None
+                    for value in row[len(column_names):])
+                for row in all_data
+            ]
+    else:
+        all_data = []
+        for result in query:
+            result.data = json.loads(result.data)  # escapes json data
+            all_data.append(model_to_dict(result, recurse=False))
+
+    next_cursor = None
+    if len(all_data) > limit:
+        del all_data[limit:]
+        if columnar or field_keys:
+            next_cursor = encode_cursor(
+                all_data[-1][_COLUMNAR_CREATED_DATE_INDEX], all_data[-1][0])
+        else:
+            next_cursor = encode_cursor(all_data[-1]['created_date'],
+                                        all_data[-1]['id'])
+    if columnar:
+        all_data = to_columns(
+            column_names +
+            ['data.' + '.'.join(keys) for keys in field_keys],
+            all_data, _COLUMNAR_EPOCH_COLUMNS)
+    elif field_keys:
+        all_data = [
+            dict(zip(column_names, row),
+                 data=_to_nested_data(field_keys, row[len(column_names):]))
+            for row in all_data
+        ]
+    return all_data, next_cursor
+
+
 class WeatherService():
     def get_current_weather(self):
         """Retrieves the current weather data"""
@@ -20,7 +254,10 @@ class WeatherService():
             Weather.create(created_date=to_utc_datetime(),
                            data=weather_data,
                            data_source=1,
-                           weather_forecast_type=Forecast.HOURLY)
+                           weather_forecast_type=Forecast.HOURLY,
+                           **_extract_weather_columns(weather_data))
+            _DataVersionService.bump_version(_DataVersionService,
+                                             WEATHER_VERSION_NAME)
             return HTTPStatus.CREATED
         except BaseException:
             raise
@@ -33,15 +270,51 @@ class WeatherService():
                            data=weather_data,
                            data_source=1,
                            weather_forecast_type=Forecast.FIVE_DAYS_THREE_HOUR)
+            _DataVersionService.bump_version(_DataVersionService,
+                                             WEATHER_VERSION_NAME)
             return HTTPStatus.CREATED
         except BaseException:
             raise
 
+    def backfill_weather_columns(self):
+        """Extracts the typed columns of current weather rows that have been
+        stored before the columns existed
+
+        Returns:
+            int -- number of rows that have been updated
+        """
+        updated = 0
+        last_id = 0
+        while True:
+            query = Weather.select(Weather.id, Weather.data).where(
+                Weather.id > last_id,
+                Weather.weather_forecast_type == Forecast.HOURLY,
+                Weather.measured_date.is_null()).order_by(
+                    Weather.id.asc()).limit(_BACKFILL_CHUNK_SIZE)
+            rows = list(query.tuples())
+            if not rows:
+                if updated:
+                    _DataVersionService.bump_version(_DataVersionService,
+                                                     WEATHER_VERSION_NAME)
+                return updated
+            with database.atomic():
+                for weather_id, weather_data in rows:
+                    columns = _extract_weather_columns(weather_data)
+                    if columns:
+                        Weather.update(**columns).where(
+                            Weather.id == weather_id).execute()
+                        updated += 1
+            last_id = rows[-1][0]
+
     # flake8: noqa: C901
+    @use_replica
     def retrieve_all_weather_data(self, limit: int, start_date: str,
                                   end_date: str, order_by: str, sort: str,
-                                  forecast_type: str):
-        """Retrieves all weather data
+                                  forecast_type: str, cursor: str = None,
+                                  columnar: bool = False,
+                                  fields: str = None):
+        """Retrieves all weather data. Results ordered by id or created_date
+        are paginated with a cursor, ordered by (created_date, id).
 
         Arguments:
             limit {int} -- limits the number of results
@@ -51,11 +324,21 @@ class WeatherService():
             sort {str} -- sorts the data in ascending or descending order
             forecast_type {str} -- forecast type
 
+        Keyword Arguments:
+            cursor {str} -- cursor of the page to retrieve, as returned for
+            the previous page (default: {None})
+            columnar {bool} -- returns one list of values per typed column,
+            with the dates as seconds since the epoch, the raw data is not
+            returned (default: {False})
+            fields {str} -- comma separated dotted paths of the fields of the
+            raw data to return instead of the raw data, e.g. main.temp. The
+            fields are extracted by the database (default: {None})
+
         Returns:
-            WeatherData -- An array of all weather data
+            tuple -- An array of all weather data, or a dictionary of columns
+            in columnar format, and the cursor of the next page, None on the
+            last page
         """
-        all_data_array = []
-
         obj_attributes = filter_items_from_list(dir(Weather), '^__')
         order_by_field = Weather
 
@@ -90,15 +373,9 @@ class WeatherService():
             raise ValueError(HTTPStatus.BAD_REQUEST,
                              f'Field {order_by.strip().lower()} does not exist')
 
-        if sort.lower() in _ALLOWED_SORT_VALUES:
-            if sort.lower() == _ALLOWED_SORT_VALUES[0]:
-                query = query.order_by(order_by_field.asc())
-            else:
-                query = query.order_by(order_by_field.desc())
-        else:
-            raise ValueError(
-                HTTPStatus.BAD_REQUEST,
-                'Invalid sort value, only "asc" or "desc" are allowed')
+        is_paginated = order_by.strip().lower() in _CURSOR_ORDER_BY_VALUES
+        query = _order_weather_query(query, order_by_field, is_paginated,
+                                     sort, cursor)
 
         try:
             casted_limit = int(limit)
@@ -106,8 +383,12 @@ class WeatherService():
             raise ValueError(
                 HTTPStatus.BAD_REQUEST,
                 'Invalid limit value, only values of type <int> are allowed')
+        if casted_limit < 1:
+            raise ValueError(HTTPStatus.BAD_REQUEST,
+                             'Invalid limit value, limit must be at least 1')
 
-        query = query.limit(casted_limit)
+        # One extra row is fetched to find out if there is a next page
+        query = query.limit(casted_limit + 1 if is_paginated else casted_limit)
 
         if forecast_type == 'hourly':
             query = query.where(Weather.weather_forecast_type == 'HOURLY')
@@ -115,10 +396,6 @@ class WeatherService():
             query = query.where(
                 Weather.weather_forecast_type == 'FIVE_DAYS_THREE_HOUR')
 
-        try:
-            for result in query:
-                result.data = json.loads(result.data)  # escapes json data
-                all_data_array.append(model_to_dict(result, recurse=False))
-            return all_data_array
-        except BaseException:
-            raise
+        field_keys = _parse_fields(fields) if fields is not None else None
+
+        return _get_weather_page(query, casted_limit, columnar, field_keys)
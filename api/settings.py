@@ -37,6 +37,55 @@ FLASK_SECRET_KEY = _os.getenv("FLASK_SECRET_KEY")
 
 NUMBER_OF_BACKGROUND_WORKERS = _os.getenv("NUMBER_OF_BACKGROUND_WORKERS")
 
+# Supported ingestion modes are 'sync' and 'write_behind'
+INGESTION_MODE = _os.getenv("INGESTION_MODE", "sync").lower().strip()
+INGESTION_WAL_DIRECTORY = _os.getenv("INGESTION_WAL_DIRECTORY",
+                                     GET_PATH() + '/wal')
+INGESTION_FLUSH_SIZE = int(_os.getenv("INGESTION_FLUSH_SIZE", 500))
+INGESTION_FLUSH_INTERVAL = float(_os.getenv("INGESTION_FLUSH_INTERVAL", 5))
+INGESTION_WAL_FSYNC = _os.getenv("INGESTION_WAL_FSYNC",
+                                 "false").lower().strip() == "true"
+IDEMPOTENCY_KEY_CACHE_SIZE = int(_os.getenv("IDEMPOTENCY_KEY_CACHE_SIZE",
+                                            100000))
+DATA_SOURCE_CACHE_TTL = float(_os.getenv("DATA_SOURCE_CACHE_TTL", 300))
+
+# Monthly range partitioning of data_source_data and weather
+PARTITIONING_ENABLED = _os.getenv("PARTITIONING_ENABLED",
+                                  "false").lower().strip() == "true"
+PARTITION_MONTHS_AHEAD = int(_os.getenv("PARTITION_MONTHS_AHEAD", 3))
+# Number of months to keep, 0 keeps all partitions
+PARTITION_RETENTION_MONTHS = int(_os.getenv("PARTITION_RETENTION_MONTHS", 0))
+# Supported retention actions are 'drop' and 'archive'
+PARTITION_RETENTION_ACTION = _os.getenv("PARTITION_RETENTION_ACTION",
+                                        "archive").lower().strip()
+
+# Archiving of old data_source_data and weather rows to Parquet files
+ARCHIVE_ENABLED = _os.getenv("ARCHIVE_ENABLED",
+                             "false").lower().strip() == "true"
+ARCHIVE_DIRECTORY = _os.getenv("ARCHIVE_DIRECTORY", GET_PATH() + '/archive')
+ARCHIVE_AFTER_DAYS = int(_os.getenv("ARCHIVE_AFTER_DAYS", 365))
+ARCHIVE_DELETE_CHUNK_SIZE = int(_os.getenv("ARCHIVE_DELETE_CHUNK_SIZE", 1000))
+
+# Compression of the API and dashboard responses
+COMPRESSION_ENABLED = _os.getenv("COMPRESSION_ENABLED",
+                                 "true").lower().strip() == "true"
+COMPRESSION_MIN_SIZE = int(_os.getenv("COMPRESSION_MIN_SIZE", 500))
+COMPRESSION_GZIP_LEVEL = int(_os.getenv("COMPRESSION_GZIP_LEVEL", 6))
+COMPRESSION_BROTLI_QUALITY = int(_os.getenv("COMPRESSION_BROTLI_QUALITY", 4))
+
+# Cache of the crowd forecast responses
+FORECAST_CACHE_SIZE = int(_os.getenv("FORECAST_CACHE_SIZE", 128))
+FORECAST_CACHE_TTL = float(_os.getenv("FORECAST_CACHE_TTL", 3600))
+FORECAST_VERSION_CHECK_INTERVAL = float(
+    _os.getenv("FORECAST_VERSION_CHECK_INTERVAL", 5))
+
+TOKEN_USAGE_FLUSH_INTERVAL = int(_os.getenv("TOKEN_USAGE_FLUSH_INTERVAL",
+                                            60))
+TOKEN_STATE_CACHE_SIZE = int(_os.getenv("TOKEN_STATE_CACHE_SIZE", 10000))
+TOKEN_STATE_CACHE_TTL = float(_os.getenv("TOKEN_STATE_CACHE_TTL", 300))
+TOKEN_STATE_VERSION_CHECK_INTERVAL = float(
+    _os.getenv("TOKEN_STATE_VERSION_CHECK_INTERVAL", 5))
+
 JWT_SECRET_KEY = _os.getenv("JWT_SECRET_KEY")
 JWT_TOKEN_LOCATION = _split_string(_os.getenv("JWT_TOKEN_LOCATION"))
 JWT_ACCESS_TOKEN_EXPIRES = int(_os.getenv("JWT_ACCESS_TOKEN_EXPIRES"))
@@ -56,6 +105,14 @@ MYSQL_HOST = _os.getenv("MYSQL_HOST")
 MYSQL_DATABASE = _os.getenv("MYSQL_DATABASE")
 MYSQL_USER = _os.getenv("MYSQL_USER")
 MYSQL_PASSWORD = _os.getenv("MYSQL_PASSWORD")
+MYSQL_MAX_CONNECTIONS = int(_os.getenv("MYSQL_MAX_CONNECTIONS", 20))
+MYSQL_STALE_TIMEOUT = int(_os.getenv("MYSQL_STALE_TIMEOUT", 300))
+MYSQL_WAIT_TIMEOUT = int(_os.getenv("MYSQL_WAIT_TIMEOUT", 10))
+# Comma separated database URLs of the read replicas
+MYSQL_REPLICA_URLS = [
+    url.strip() for url in _os.getenv("MYSQL_REPLICA_URLS", "").split(',')
+    if url.strip()
+]
 
 UNIFI_ADDRESS = _os.getenv("UNIFI_ADDRESS")
 UNIFI_USER = _os.getenv("UNIFI_USER")
@@ -0,0 +1,150 @@
+import os
+import sys
+import types
+
+import pytest
+from flask import Flask
+from flask_jwt_extended import JWTManager
+from flask_restplus import Api
+from peewee import EXCLUDED, SqliteDatabase, fn
+
+# Settings that are required when api.settings is imported
+os.environ.setdefault('JWT_TOKEN_LOCATION', 'headers')
+os.environ.setdefault('JWT_ACCESS_TOKEN_EXPIRES', '900')
+os.environ.setdefault('ALLOWED_OAUTH_CLIENTS', 'google')
+os.environ.setdefault('INGESTION_MODE', 'sync')
+
+_API_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'api')
+
+
+def _register_package(name: str, path: str):
+    package = types.ModuleType(name)
+    package.__path__ = [path]
+    sys.modules[name] = package
+
+
+# Importing the api and api.routes packages creates the application, which
+# connects to MySQL. The packages are registered without running their
+# __init__ so the tests can import the modules they need.
+_register_package('api', _API_PATH)
+_register_package('api.routes', os.path.join(_API_PATH, 'routes'))
+
+
+def pytest_addoption(parser):
+    parser.addoption('--benchmark',
+                     action='store_true',
+                     help='run the benchmarks, use -s to see the timings')
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers',
+                            'benchmark: slow benchmark, run with --benchmark')
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--benchmark'):
+        return
+    skip_benchmark = pytest.mark.skip(reason='run with --benchmark')
+    for item in items:
+        if 'benchmark' in item.keywords:
+            item.add_marker(skip_benchmark)
+
+
+class QueryCountingDatabase(SqliteDatabase):
+    """An in-memory SQLite database that records the executed statements and
+    their parameters"""
+    def __init__(self):
+        super().__init__(':memory:')
+        self.statements = []
+        self.parameters = []
+
+    def execute_sql(self, sql, params=None, *args, **kwargs):
+        self.statements.append(sql)
+        self.parameters.append(params)
+        return super().execute_sql(sql, params, *args, **kwargs)
+
+
+def _get_models():
+    from api.models import Base
+    models = []
+    subclasses = Base.__subclasses__()
+    while subclasses:
+        model = subclasses.pop(0)
+        models.append(model)
+        subclasses.extend(model.__subclasses__())
+    return models
+
+
+@pytest.fixture
+def models():
+    """Retrieves all the models"""
+    return _get_models()
+
+
+@pytest.fixture
+def database(models, monkeypatch):
+    """Binds the models to an empty in-memory SQLite database and clears the
+    caches of the services"""
+    from api.helpers import RecentKeySet
+    from api.services import data_source_data
+    from api.services.data_source import _data_source_cache
+    from api.services.data_source_token import (_token_state_cache,
+                                                _token_state_version,
+                                                _usage_counters)
+    test_database = QueryCountingDatabase()
+    with test_database.bind_ctx(models):
+        test_database.create_tables(models)
+        _data_source_cache.clear()
+        _token_state_cache.clear()
+        _usage_counters.clear()
+        _token_state_version.update({'version': None, 'checked_at': 0.0})
+        monkeypatch.setattr(data_source_data, '_recent_idempotency_keys',
+                            RecentKeySet())
+        # The transactions of the service are opened on the test database
+        monkeypatch.setattr(data_source_data, 'database', test_database)
+        yield test_database
+    test_database.close()
+
+
+def _add_rows_to_rollups(self, rows: list):
+    # SQLite version of the MySQL upsert of the rollup service
+    from api.services.data_source_data_rollup import _ROLLUPS, _aggregate_rows
+    for model, bucket_format in _ROLLUPS:
+        model.insert_many(_aggregate_rows(rows, bucket_format)).on_conflict(
+            conflict_target=[model.data_source, model.bucket],
+            update={
+                model.no_of_readings:
+                model.no_of_readings + EXCLUDED.no_of_readings,
+                model.sum_of_clients:
+                model.sum_of_clients + EXCLUDED.sum_of_clients,
+                model.sum_of_occasional_clients:
+                model.sum_of_occasional_clients +
+                EXCLUDED.sum_of_occasional_clients,
+                model.min_of_clients:
+                fn.MIN(model.min_of_clients, EXCLUDED.min_of_clients),
+                model.max_of_clients:
+                fn.MAX(model.max_of_clients, EXCLUDED.max_of_clients)
+            }).execute()
+
+
+@pytest.fixture
+def rollups(database, monkeypatch):
+    """Replaces the MySQL upsert of the rollups by an SQLite upsert"""
+    from api.services import DataSourceDataRollupService
+    monkeypatch.setattr(DataSourceDataRollupService, 'add_rows_to_rollups',
+                        _add_rows_to_rollups)
+
+
+@pytest.fixture
+def app():
+    """Creates an application that serves the data routes"""
+    from api.helpers import JSONEncoder
+    from api.routes.data_source_data import api as data_source_data_api
+    app = Flask(__name__)
+    app.json_encoder = JSONEncoder
+    app.config['JWT_SECRET_KEY'] = 'test'
+    app.config['JWT_TOKEN_LOCATION'] = ['headers']
+    app.config['PROPAGATE_EXCEPTIONS'] = True
+    JWTManager(app)
+    Api(app).add_namespace(data_source_data_api)
+    return app
@@ -0,0 +1,99 @@
+from http import HTTPStatus
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+_CREATED_DATE = '2020-01-01 12:00:00'
+_IDEMPOTENCY_KEY = '2020-01-01T12:00:00'
+
+
+@pytest.fixture
+def data_source_token(database):
+    """Creates a data source with a token and a stored reading"""
+    from api.models import DataSource, DataSourceData, DataSourceToken, User
+    user = User.create(email='admin@example.com',
+                       join_date=_CREATED_DATE,
+                       last_login_date=_CREATED_DATE)
+    data_source = DataSource.create(source='sensor',
+                                    description='A sensor',
+                                    user=user)
+    DataSourceData.create(data_source=data_source,
+                          no_of_clients=4,
+                          created_date=_CREATED_DATE,
+                          idempotency_key=_IDEMPOTENCY_KEY)
+    return DataSourceToken.create(user=user,
+                                  data_source=data_source,
+                                  created_date=_CREATED_DATE,
+                                  expiry_date='2021-01-01 12:00:00',
+                                  deactivated_since=_CREATED_DATE,
+                                  no_of_usage=0)
+
+
+def _post_reading(app, data_source_token, idempotency_key=_IDEMPOTENCY_KEY):
+    with app.app_context():
+        token = create_access_token(
+            identity={
+                'is_user_token': False,
+                'data_source_token': {
+                    'id': data_source_token.id,
+                    'data_source': data_source_token.data_source_id
+                }
+            })
+    return app.test_client().post(
+        '/data',
+        json={
+            'no_of_clients': 4,
+            'idempotency_key': idempotency_key
+        },
+        headers={'Authorization': f'Bearer {token}'})
+
+
+def _get_no_of_usage(data_source_token):
+    from api.services.data_source_token import _usage_counters
+    return _usage_counters[data_source_token.id][0]
+
+
+def test_post_data_resolves_token_once(app, database, rollups,
+                                       data_source_token):
+    from api.models import DataSourceDataDaily, DataSourceDataHourly
+    # The route is wrapped by jwt_required_extended and check_for('Machine')
+    database.statements.clear()
+    response = _post_reading(app, data_source_token, '2020-01-01T12:01:00')
+
+    assert response.status_code == HTTPStatus.OK
+    assert _get_no_of_usage(data_source_token) == 1
+    token_statements = [
+        sql for sql in database.statements if '"data_source_token"' in sql
+    ]
+    assert len(token_statements) == 1
+    # The token state version, the token state, the data source, the
+    # transaction, the insert and an upsert per rollup
+    assert len(database.statements) == 7
+    assert DataSourceDataHourly.select().count() == 1
+    assert DataSourceDataDaily.select().count() == 1
+
+
+def test_post_duplicate_data_resolves_token_once(app, database,
+                                                 data_source_token):
+    database.statements.clear()
+    response = _post_reading(app, data_source_token)
+
+    assert response.status_code == HTTPStatus.OK
+    assert _get_no_of_usage(data_source_token) == 1
+    token_statements = [
+        sql for sql in database.statements if '"data_source_token"' in sql
+    ]
+    assert len(token_statements) == 1
+    # The token state version, the token state, the data source and the
+    # insert that is rejected by the unique index
+    assert len(database.statements) == 5
+
+
+def test_post_data_is_served_from_caches(app, database, data_source_token):
+    _post_reading(app, data_source_token)
+    database.statements.clear()
+    response = _post_reading(app, data_source_token)
+
+    assert response.status_code == HTTPStatus.OK
+    assert _get_no_of_usage(data_source_token) == 2
+    assert database.statements == []
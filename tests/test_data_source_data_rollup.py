@@ -0,0 +1,37 @@
+from datetime import datetime
+
+
+def _add_readings(*no_of_clients_per_reading):
+    from api.services import DataSourceDataRollupService
+    # Every reading is added separately, so the rollup rows are updated
+    for minute, no_of_clients in enumerate(no_of_clients_per_reading):
+        DataSourceDataRollupService.add_rows_to_rollups(
+            DataSourceDataRollupService, [{
+                'data_source': 1,
+                'no_of_clients': no_of_clients,
+                'created_date': datetime(2020, 1, 1, 12, minute)
+            }])
+
+
+def _get_hourly_no_of_clients(**kwargs):
+    from api.services import DataSourceDataRollupService
+    return [
+        hour['no_of_clients']
+        for hour in DataSourceDataRollupService.
+        get_hourly_data_from_data_source(DataSourceDataRollupService, 1,
+                                         '2020-01-01', '2020-01-02', **kwargs)
+    ]
+
+
+def test_hourly_data_is_the_mean_of_the_readings(database, rollups):
+    _add_readings(5, 15)
+
+    assert _get_hourly_no_of_clients() == [10]
+
+
+def test_occasional_clients_are_subtracted_per_reading(database, rollups):
+    # The always connected clients are subtracted from every reading before
+    # the mean is taken, a reading has at least 0 occasional clients
+    _add_readings(5, 15)
+
+    assert _get_hourly_no_of_clients(occasional_clients=True) == [3.5]
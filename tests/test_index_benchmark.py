@@ -0,0 +1,148 @@
+"""Benchmarks of the time range indexes against a seeded year of data. The
+queries of the services are timed and explained without and with the index,
+the index is removed and added the same way as the migration of an existing
+database. Run with: python -m pytest --benchmark -s -m benchmark"""
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from peewee import chunked
+from playhouse.migrate import SqliteMigrator, migrate
+
+_START_DATE = datetime(2020, 1, 1)
+_NO_OF_DATA_SOURCES = 4
+_READING_INTERVAL = timedelta(minutes=10)
+_WEATHER_INTERVAL = timedelta(hours=1)
+_FORECAST_TYPES = ('HOURLY', 'FIVE_DAYS_THREE_HOUR')
+_INSERT_CHUNK_SIZE = 1000
+
+pytestmark = pytest.mark.benchmark
+
+
+def _dates(interval: timedelta):
+    created_date = _START_DATE
+    while created_date < _START_DATE + timedelta(days=365):
+        yield created_date
+        created_date += interval
+
+
+def _create_readings():
+    for created_date in _dates(_READING_INTERVAL):
+        for data_source_id in range(1, _NO_OF_DATA_SOURCES + 1):
+            yield {
+                'data_source': data_source_id,
+                'no_of_clients': created_date.hour,
+                'created_date': created_date
+            }
+
+
+def _create_weather(data_source_id: int):
+    for created_date in _dates(_WEATHER_INTERVAL):
+        for forecast_type in _FORECAST_TYPES:
+            # The service stores the raw weather data as a JSON string
+            yield {
+                'data_source': data_source_id,
+                'created_date': created_date,
+                'weather_forecast_type': forecast_type,
+                'data': '{}'
+            }
+
+
+def _insert(database, model, rows):
+    with database.atomic():
+        for chunk in chunked(rows, _INSERT_CHUNK_SIZE):
+            model.insert_many(chunk).execute()
+
+
+def _time(fn, repeat: int = 20):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat
+
+
+def _explain_last_select(database, fn):
+    """Runs a function and explains the last select it executed
+
+    Returns:
+        list -- details of the query plan
+    """
+    database.statements.clear()
+    database.parameters.clear()
+    fn()
+    selects = [(sql, params)
+               for sql, params in zip(database.statements, database.parameters)
+               if sql.startswith('SELECT')]
+    sql, params = selects[-1]
+    cursor = database.execute_sql(f'EXPLAIN QUERY PLAN {sql}', params)
+    # The last column contains the description of a step of the plan
+    return [row[-1] for row in cursor.fetchall()]
+
+
+def _benchmark(database, table_name: str, columns: tuple, fn):
+    """Times and explains a query without and with an index
+
+    Returns:
+        list -- details of the query plan with the index
+    """
+    migrator = SqliteMigrator(database)
+    index_name = f'{table_name}_{"_".join(columns)}'
+    migrate(migrator.drop_index(table_name, index_name))
+    database.execute_sql('ANALYZE')
+    plan_without_index = _explain_last_select(database, fn)
+    time_without_index = _time(fn)
+
+    # The migration that adds the index to an existing database
+    migrate(migrator.add_index(table_name, columns, False))
+    database.execute_sql('ANALYZE')
+    plan_with_index = _explain_last_select(database, fn)
+    time_with_index = _time(fn)
+
+    print(f'\n{index_name}\n'
+          f'without index: {time_without_index * 1000:.2f} ms, plan: '
+          f'{plan_without_index}\n'
+          f'with index: {time_with_index * 1000:.2f} ms, plan: '
+          f'{plan_with_index}')
+    return plan_with_index
+
+
+def test_benchmark_data_source_data_index(database):
+    from api.models import DataSource, DataSourceData, User
+    from api.services import DataSourceDataService
+    user = User.create(email='admin@example.com',
+                       join_date=_START_DATE,
+                       last_login_date=_START_DATE)
+    for data_source_id in range(1, _NO_OF_DATA_SOURCES + 1):
+        DataSource.create(source=f'sensor {data_source_id}',
+                          description='A sensor',
+                          user=user)
+    _insert(database, DataSourceData, _create_readings())
+
+    plan = _benchmark(
+        database, 'data_source_data', ('data_source_id', 'created_date'),
+        lambda: DataSourceDataService.get_all_data_from_data_source(
+            DataSourceDataService, 2, 100, '2020-06-01', '2020-06-30'))
+
+    assert any('data_source_data_data_source_id_created_date' in detail
+               for detail in plan)
+
+
+def test_benchmark_weather_index(database):
+    from api.models import DataSource, User, Weather
+    from api.services import WeatherService
+    user = User.create(email='admin@example.com',
+                       join_date=_START_DATE,
+                       last_login_date=_START_DATE)
+    data_source = DataSource.create(source='weather',
+                                    description='Weather API',
+                                    user=user)
+    _insert(database, Weather, _create_weather(data_source.id))
+
+    plan = _benchmark(
+        database, 'weather', ('weather_forecast_type', 'created_date'),
+        lambda: WeatherService.retrieve_all_weather_data(
+            WeatherService, 100, '2020-06-01', '2020-06-30', 'created_date',
+            'desc', 'hourly'))
+
+    assert any('weather_weather_forecast_type_created_date' in detail
+               for detail in plan)
@@ -0,0 +1,96 @@
+import time
+from datetime import date, datetime, timedelta
+
+import numpy
+import pandas
+import pytest
+from flask import json
+
+_ROWS = 10000
+
+
+def _create_rows(no_of_rows: int):
+    # The rows of a /api/v1/data response
+    created_date = datetime(2020, 1, 1)
+    return [{
+        'id': row_id,
+        'data_source': row_id % 4 + 1,
+        'no_of_clients': row_id % 50,
+        'created_date': created_date + timedelta(minutes=row_id),
+        'idempotency_key': None
+    } for row_id in range(no_of_rows)]
+
+
+def _create_data_response(rows: list):
+    from api.helpers import SuccessObject
+    return SuccessObject.create_response(SuccessObject, 200, rows, True,
+                                         'MjAyMC0wMS0wMQ')
+
+
+@pytest.mark.parametrize('data', [
+    {
+        'created_date': datetime(2020, 1, 2, 3, 4, 5),
+        'date': date(2020, 1, 2),
+        'timestamp': pandas.Timestamp('2020-01-02 03:04:05'),
+        'float64': numpy.float64(0.1),
+        'float32': numpy.float32(0.1),
+        'int64': numpy.int64(3),
+        'values': [1, 2.0, 0.25, 1e15, None, True],
+    },
+    {
+        'small': 1e-05
+    },
+    {
+        'large': 1e16
+    },
+    {
+        'nan': float('nan'),
+        'infinity': float('inf')
+    },
+    {
+        'numpy_small': numpy.float64(1e-07)
+    },
+    {
+        'description': 'licht bewölkt'
+    },
+    {
+        'no_of_clients': 2**70
+    },
+    [{
+        'b': 1,
+        'a': -0.0
+    }],
+])
+def test_jsonify_is_identical_to_stdlib(app, data):
+    from api.helpers import jsonify
+    with app.test_request_context():
+        assert jsonify(data).get_data() == json.jsonify(data).get_data()
+
+
+def test_jsonify_of_data_response_is_identical_to_stdlib(app):
+    from api.helpers import jsonify
+    from api.helpers.json_provider import _fast_dumps
+    data = _create_data_response(_create_rows(100))
+    with app.test_request_context():
+        # Serialized by orjson
+        assert _fast_dumps(data) is not None
+        assert jsonify(data).get_data() == json.jsonify(data).get_data()
+
+
+def _time(fn, repeat: int = 5):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat
+
+
+@pytest.mark.benchmark
+def test_benchmark_jsonify_of_data_response(app):
+    from api.helpers import jsonify
+    data = _create_data_response(_create_rows(_ROWS))
+    with app.test_request_context():
+        assert jsonify(data).get_data() == json.jsonify(data).get_data()
+        stdlib_time = _time(lambda: json.jsonify(data))
+        orjson_time = _time(lambda: jsonify(data))
+    print(f'\nSerialized {_ROWS} rows, stdlib: {stdlib_time * 1000:.1f} ms, '
+          f'orjson: {orjson_time * 1000:.1f} ms')
@@ -0,0 +1,102 @@
+import pytest
+from peewee import SqliteDatabase
+
+_CREATED_DATE = '2020-01-01 12:00:00'
+
+
+def _create_user(email: str):
+    from api.models import User
+    return User.create(email=email,
+                       join_date=_CREATED_DATE,
+                       last_login_date=_CREATED_DATE)
+
+
+def _read_email():
+    from api.models import User
+    return User.select(User.email).scalar()
+
+
+@pytest.fixture
+def replica(models, tmp_path, monkeypatch):
+    """Binds the models to a primary database file and configures a replica
+    database file, each contains a user with its own email"""
+    from api.models import (base, close_replicas, configure_replicas,
+                            replica_reads, set_read_your_writes)
+    from api.models.base import get_read_database
+    primary = SqliteDatabase(str(tmp_path / 'primary.db'))
+    monkeypatch.setattr(base, 'database', primary)
+    configure_replicas([f'sqlite:///{tmp_path / "replica.db"}'])
+    with replica_reads():
+        replica_database = get_read_database()
+    with replica_database.bind_ctx(models):
+        replica_database.create_tables(models)
+        _create_user('replica@example.com')
+    with primary.bind_ctx(models):
+        primary.create_tables(models)
+        _create_user('primary@example.com')
+        yield replica_database
+    close_replicas()
+    configure_replicas([])
+    set_read_your_writes(False)
+    primary.close()
+
+
+def test_select_outside_replica_reads_uses_primary(replica):
+    assert _read_email() == 'primary@example.com'
+
+
+def test_select_within_replica_reads_uses_replica(replica):
+    from api.models import replica_reads
+    with replica_reads():
+        assert _read_email() == 'replica@example.com'
+
+
+def test_use_replica_sends_selects_to_replica(replica):
+    from api.models import use_replica
+    assert use_replica(_read_email)() == 'replica@example.com'
+
+
+def test_writes_within_replica_reads_use_primary(replica):
+    from api.models import User, replica_reads
+    with replica_reads():
+        _create_user('new@example.com')
+    assert User.select().where(User.email == 'new@example.com').exists()
+    with replica.bind_ctx([User]):
+        assert not User.select().where(
+            User.email == 'new@example.com').exists()
+
+
+def test_transaction_reads_from_primary(replica):
+    from api.models import base, replica_reads
+    with replica_reads(), base.database.atomic():
+        assert _read_email() == 'primary@example.com'
+
+
+def test_read_your_writes_reads_from_primary(replica):
+    from api.models import replica_reads, set_read_your_writes
+    # Enabled by the X-Read-Your-Writes header of a request
+    set_read_your_writes(True)
+    with replica_reads():
+        assert _read_email() == 'primary@example.com'
+
+
+def test_stream_all_data_reads_chunks_from_replica(replica, monkeypatch):
+    from api.models import DataSourceData
+    from api.services import DataSourceDataService
+    from api.services import data_source_data
+    # Every chunk after the first continues after the last row of the
+    # previous chunk
+    monkeypatch.setattr(data_source_data, '_STREAM_FETCH_SIZE', 2)
+    with replica.bind_ctx([DataSourceData]):
+        DataSourceData.insert_many([{
+            'data_source': 1,
+            'no_of_clients': no_of_clients,
+            'created_date': f'2020-01-01 12:0{no_of_clients}:00'
+        } for no_of_clients in range(5)]).execute()
+
+    rows = DataSourceDataService.stream_all_data(DataSourceDataService,
+                                                 start_date=None,
+                                                 end_date=None,
+                                                 sort='asc')
+
+    assert [row['no_of_clients'] for row in rows] == [0, 1, 2, 3, 4]
@@ -0,0 +1,96 @@
+from datetime import datetime
+from http import HTTPStatus
+
+import pytest
+
+
+@pytest.fixture
+def weather(database):
+    """Creates five hours of hourly weather data"""
+    from api.models import DataSource, User, Weather
+    user = User.create(email='admin@example.com',
+                       join_date=datetime(2020, 1, 1),
+                       last_login_date=datetime(2020, 1, 1))
+    data_source = DataSource.create(source='weather',
+                                    description='Weather API',
+                                    user=user)
+    # The service stores the raw weather data as a JSON string
+    return [
+        Weather.create(data_source=data_source,
+                       created_date=datetime(2020, 1, 1, hour),
+                       weather_forecast_type='HOURLY',
+                       data='{}').id for hour in range(5)
+    ]
+
+
+def _retrieve_page(order_by: str, sort: str, cursor: str = None):
+    from api.services import WeatherService
+    return WeatherService.retrieve_all_weather_data(WeatherService,
+                                                    2,
+                                                    None,
+                                                    None,
+                                                    order_by,
+                                                    sort,
+                                                    'hourly',
+                                                    cursor=cursor)
+
+
+@pytest.mark.parametrize('sort', ['asc', 'desc'])
+def test_pages_follow_the_cursor(weather, sort):
+    ids, cursor = [], None
+    while True:
+        data, cursor = _retrieve_page('created_date', sort, cursor)
+        ids.extend(row['id'] for row in data)
+        if cursor is None:
+            break
+
+    assert ids == (weather if sort == 'asc' else weather[::-1])
+
+
+def test_other_fields_are_ordered_without_cursor(weather):
+    data, cursor = _retrieve_page('temp', 'asc')
+
+    assert len(data) == 2
+    assert cursor is None
+
+
+def test_cursor_requires_paginated_order(weather):
+    _, cursor = _retrieve_page('created_date', 'asc')
+
+    with pytest.raises(ValueError) as err:
+        _retrieve_page('temp', 'asc', cursor)
+    assert err.value.args[0] == HTTPStatus.BAD_REQUEST
+
+
+def test_invalid_sort_is_rejected(weather):
+    with pytest.raises(ValueError) as err:
+        _retrieve_page('created_date', 'up')
+    assert err.value.args[0] == HTTPStatus.BAD_REQUEST
+
+
+def test_backfill_reads_rows_by_forecast_type_and_measured_date(
+        weather, database, monkeypatch):
+    from api.models import Weather
+    from api.services import (DataVersionService, WeatherService,
+                              weather as weather_service)
+    monkeypatch.setattr(weather_service, 'database', database)
+    # The version is bumped by a MySQL upsert
+    monkeypatch.setattr(DataVersionService, 'bump_version',
+                        lambda self, name: None)
+    weather_id = Weather.create(
+        data_source=1,
+        created_date=datetime(2020, 1, 1, 5),
+        weather_forecast_type='HOURLY',
+        data='{"dt": 1577854800, "main": {"temp": 5.5}}').id
+    database.statements.clear()
+    database.parameters.clear()
+
+    assert WeatherService.backfill_weather_columns(WeatherService) == 6
+
+    row = Weather.get_by_id(weather_id)
+    assert (row.measured_date, row.temp) == (datetime(2020, 1, 1, 5), 5.5)
+    cursor = database.execute_sql(
+        f'EXPLAIN QUERY PLAN {database.statements[0]}',
+        database.parameters[0])
+    assert any('weather_weather_forecast_type_measured_date' in row[-1]
+               for row in cursor.fetchall())